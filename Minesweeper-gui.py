@@ -12,10 +12,16 @@ Programmer Beast Mode Spotify playlist: https://open.spotify.com/playlist/4Akns5
 Project specs, files, code all over the place? Start using Backlog for efficient management!! There is a free tier: https://cutt.ly/ehxImv5
 """
 
-import random
-import re
+import numpy as np
 import pygame
 
+from cell_mask import CellMask
+from frontier import Frontier
+from rendering import BoardSurface, Camera, SpriteAtlas
+from snapshot import Snapshot, load_snapshot, save_snapshot
+from solver import exhaustive_ids
+from board_engine import Minefield, neighbor_table
+
 """
 classi:
     Board_data
@@ -45,47 +51,9 @@ classi:
     
 """
 
-class Board_data():
-    def __init__(self,rows,columns,n_bombs) -> None:
-        self.rows = rows
-        self.columns = columns
-        self.n_bombs = n_bombs
-
-        self.bombs = set()
-        self.board = []
-
-        self.init_board()
-
-    def init_board(self):
-
-        all_position = {(r,c) for c in range(self.columns) for r in range(self.rows)}
-
-        while len(self.bombs)<self.n_bombs:
-            self.bombs.add(random.choice(tuple(all_position - self.bombs)))
+class Board_data(Minefield):
+    # bombe, numeri e regioni vengono da board_engine.Minefield, comune anche a Minesweeper.py
 
-        self.board = [['*' if (r,c) in self.bombs else None for c in range(self.columns)] for r in range(self.rows)]
-
-        self.assign_values_to_board()
-    
-    def assign_values_to_board(self):
-        for r in range(self.rows):
-            for c in range(self.columns):
-                if self.board[r][c] == '*':
-                    self.bombs.add((r,c))
-                else:
-                    self.board[r][c] = self.get_num_neighboring_bombs(r, c)
-
-    def get_num_neighboring_bombs(self, row, col):
-        # make sure to not go out of bounds!
-
-        num_neighboring_bombs = 0
-        for r in range(max(0, row-1), min(self.rows-1, row+1)+1):
-            for c in range(max(0, col-1), min(self.columns-1, col+1)+1):
-                if self.board[r][c] == '*':
-                    num_neighboring_bombs += 1
-
-        return num_neighboring_bombs
-    
     def __str__(self) -> str:
         string = ""
         for r in self.board:
@@ -114,34 +82,66 @@ class Visible():
         self.n_bombs = n_bombs
 
         self.n_moves = 0
-        self.dug = set()
-        self.flags = set()
-        self.safe = set()
+        # un byte per cella invece di un set di tuple
+        self.dug = CellMask(rows, columns)
+        self.flags = CellMask(rows, columns)
+        self.safe = CellMask(rows, columns)
+        # numeri con vicini sconosciuti e celle sconosciute vicine a un numero, aggiornati ad ogni mossa
+        self.frontier = Frontier(rows, columns)
         self.board = []
+        # celle cambiate dall'ultima lettura, per chi disegna o per i bot
+        self.dirty = []
     
     @property
     def remaining_bombs(self) -> int:
         return self.n_bombs - len(self.flags)
+
+    def take_dirty(self) -> list:
+        """Restituisce le celle cambiate dall'ultima chiamata come (riga, colonna) e svuota la lista"""
+        dirty, self.dirty = self.dirty, []
+        return [divmod(cell, self.columns) for cell in dirty]
+
+    # dentro si lavora con indici piatti riga * columns + colonna; flag e unflag
+    # sono gli adattatori per chi usa le tuple
+    def flag_ids(self, ids) -> list:
+        bits = self.flags.bits
+        changed = [cell for cell in ids if not bits[cell]]
+        if not changed:
+            return changed
+        self.flags.add_flat(changed)
+        for cell in changed:
+            if not self.dug.bits[cell]:
+                self.board[cell // self.columns][cell % self.columns] = "*"
+        self.frontier.flag(changed)
+        self.dirty.extend(changed)
+        return changed
+
+    def unflag_ids(self, ids) -> list:
+        bits = self.flags.bits
+        changed = [cell for cell in ids if bits[cell]]
+        for cell in changed:
+            self.flags.discard(divmod(cell, self.columns))
+            if not self.dug.bits[cell]:
+                self.board[cell // self.columns][cell % self.columns] = " "
+        self.frontier.unflag(changed)
+        self.dirty.extend(changed)
+        return changed
+
+    def flag(self, x) -> set:
+        cells = [x] if type(x) == tuple else x
+        return {divmod(cell, self.columns) for cell in self.flag_ids({r * self.columns + c for r, c in cells})}
     
-    def flag(self, x) -> None:
-        if type(x) == tuple:
-            self.flags.add(x)
-        if type(x) == set:
-            self.flags = self.flags | x
-    
-    def unflag(self, x) -> None:
-        if type(x) == tuple:
-            self.flags.discard(x)
-        if type(x) == set:
-            self.flags = self.flags - x
+    def unflag(self, x) -> set:
+        cells = [x] if type(x) == tuple else x
+        return {divmod(cell, self.columns) for cell in self.unflag_ids({r * self.columns + c for r, c in cells})}
 
 class Game():
-    def __init__(self, rows, columns, n_bombs) -> None:
+    def __init__(self, rows, columns, n_bombs, seed=None, lazy=False) -> None:
         self.rows = rows
         self.columns = columns
         self.n_bombs = n_bombs
 
-        self.board_data = Board_data(rows, columns, n_bombs)
+        self.board_data = Board_data(rows, columns, n_bombs, seed, lazy)
         self.visible = Visible(rows, columns, n_bombs)
         self.update_visible()
     
@@ -150,43 +150,148 @@ class Game():
         return len(self.visible.dug) == self.rows*self.columns - self.board_data.n_bombs
     
     def dig(self, row, col):
-
-        # Initialize a stack for iterative approach
-        stack = [(row, col)]
-        
-        while stack:
-            current_row, current_col = stack.pop()
-            self.visible.dug.add((current_row, current_col))  # keep track that we dug here
-            
-            if self.board_data.board[current_row][current_col] == '*':
-                # Hit a bomb, game over
-                return False
-            elif self.board_data.board[current_row][current_col] > 0:
-                # Hit a cell with neighboring bombs, continue
-                continue
-            
-            # self.board[current_row][current_col] == 0
-            for r in range(max(0, current_row-1), min(self.rows-1, current_row+1)+1):
-                for c in range(max(0, current_col-1), min(self.columns-1, current_col+1)+1):
-                    if (r, c) in self.visible.dug:
-                        continue  # skip cells already dug
-                    stack.append((r, c))
-
-        # If our initial dig didn't hit a bomb, we *shouldn't* hit a bomb here
-
-        self.update_visible()
-        return True
-
-    def update_visible(self):
-        self.visible.dug
-        self.visible.board = [[self.board_data.board[r][c] if (r,c) in self.visible.dug else "*" if (r,c) in self.visible.flags  else " " for c in range(self.columns)] for r in range(self.rows)]
+        return self.dig_many([(row, col)])
+
+    def dig_many(self, cells) -> bool:
+        """Scava tutte le celle insieme e restituisce False se tra queste c'era una bomba.
+
+        Le regioni di zeri toccate vengono unite in un solo array di indici, la
+        maschera delle celle scavate fa da insieme dei visitati e visible viene
+        aggiornato una volta sola per tutto il gruppo.
+        """
+        if isinstance(cells, CellMask):
+            ids = np.flatnonzero(cells.array)
+        else:
+            ids = np.array([r * self.columns + c for r, c in cells], dtype=np.int64)
+        return self.dig_ids(ids)
+
+    def dig_ids(self, ids) -> bool:
+        """Come dig_many, con un array di indici piatti"""
+        if not len(ids):
+            return True
+
+        self.visible.n_moves += 1
+        if not self.board_data.generated:
+            # primo click in modalita' lazy: qui non ci sono bombe
+            self.board_data.generate_around(*divmod(int(ids[0]), self.columns))
+
+        # le bombe scavate vengono scoperte come le celle con un numero: solo loro
+        safe = not (self.board_data.board.values.ravel()[ids] < 0).any()
+        dug = self.visible.dug.array
+        # celle gia' scoperte: niente da fare, e la loro regione e' gia' tutta scoperta
+        ids = ids[~dug[ids]]
+        if not len(ids):
+            return safe
+        regions = self.board_data.regions
+        labels = regions.labels[ids]
+        numbered = ids[labels < 0]
+        # a 0: reveal its whole precomputed region in one go
+        zeros = np.unique(labels[labels >= 0]).tolist()
+        if not zeros:
+            cells = np.unique(numbered) if len(numbered) > 1 else numbered
+        elif len(zeros) == 1 and not len(numbered):
+            # a single region: its cells are already without repetitions
+            cells = regions.region_cells(zeros[0])
+        else:
+            cells = np.unique(np.concatenate([numbered] + [regions.region_cells(region) for region in zeros]))
+        cells = cells[~dug[cells]]
+        self.visible.dug.add_flat(cells)
+        self.visible.frontier.reveal(cells, self.board_data.board.values.ravel()[cells] > 0)
+        self.update_visible_ids(cells)
+        return safe
+
+    def chord(self, row, col) -> bool:
+        """Su un numero gia' scoperto con tante bandierine intorno quante il numero, scava tutti gli altri vicini"""
+        if (row, col) not in self.visible.dug:
+            return True
+        value = self.visible.board[row][col]
+        vicine = neighbor_table(self.rows, self.columns).around(row * self.columns + col)
+        flags = self.visible.flags.bits
+        if value == '*' or value != sum(flags[n] for n in vicine):
+            return True
+        dug = self.visible.dug.bits
+        return self.dig_ids(np.array([n for n in vicine if not dug[n] and not flags[n]], dtype=np.int64))
+
+    def flag(self, row, col) -> set:
+        self.visible.n_moves += 1
+        return self.visible.flag((row, col))
+
+    def unflag(self, row, col) -> set:
+        self.visible.n_moves += 1
+        return self.visible.unflag((row, col))
+
+    def toggle_flag(self, row, col) -> set:
+        if (row, col) in self.visible.flags:
+            return self.unflag(row, col)
+        return self.flag(row, col)
+
+    def visible_values(self, ids=None):
+        """Valori di visible.board per le celle ids (tutte se None): numero, '*' o ' '"""
+        flags = self.visible.flags.array
+        dug = self.visible.dug.array
+        if ids is not None:
+            flags, dug = flags[ids], dug[ids]
+        values = np.full(len(dug), " ", dtype=object)
+        values[flags] = "*"
+        if dug.any():
+            revealed = self.board_data.board.values.ravel()
+            revealed = (revealed[dug] if ids is None else revealed[ids[dug]]).astype(object)
+            revealed[revealed == -1] = "*"
+            values[dug] = revealed
+        return values
+
+    def update_visible(self, cells=None):
+        """Aggiorna visible.board: solo le celle (riga, colonna) indicate, oppure tutta la griglia se cells e' None"""
+        if cells is None:
+            # tutta la griglia con NumPy: anche dopo un load da milioni di celle resta veloce
+            self.visible.board = self.visible_values().reshape(self.rows, self.columns).tolist()
+            self.visible.frontier.rebuild(self.visible.dug.array, self.visible.flags.array,
+                                          ~self.board_data.mines & (self.board_data.counts > 0))
+            return
+        self.update_visible_ids([r * self.columns + c for r, c in cells])
+
+    def update_visible_ids(self, ids):
+        """Come update_visible, con indici piatti"""
+        ids = np.asarray(ids, dtype=np.int64)
+        board = self.visible.board
+        columns = self.columns
+        for cell, value in zip(ids.tolist(), self.visible_values(ids).tolist()):
+            board[cell // columns][cell % columns] = value
+        self.visible.dirty.extend(ids.tolist())
     
+    def snapshot(self) -> Snapshot:
+        return Snapshot(self.rows, self.columns, self.n_bombs, self.board_data.seed, self.visible.n_moves,
+                        self.board_data.mines, self.visible.dug, self.visible.flags, self.board_data.generated)
+
+    def save(self, path, append=False):
+        """Salva bombe, celle scavate e bandierine un bit per cella (vedi snapshot.py)"""
+        save_snapshot(path, self.snapshot(), append)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        game = cls(snapshot.rows, snapshot.columns, snapshot.n_bombs, snapshot.seed, lazy=True)
+        if snapshot.generated:
+            # le bombe si rileggono dal file: con lazy dipendono anche dal primo click
+            game.board_data.set_mines(snapshot.mines)
+        game.visible.dug = snapshot.dug
+        game.visible.flags = snapshot.flags
+        game.visible.n_moves = snapshot.moves
+        game.update_visible()
+        return game
+
+    @classmethod
+    def load(cls, path, index=-1):
+        return cls.from_snapshot(load_snapshot(path, index))
+
     def dig_safe(self):
-        for cor in self.visible.safe:
-            self.dig(cor[0], cor[1])
-        self.visible.safe = set()
+        # tutte le celle sicure trovate dal Bot in un solo dig
+        safe = self.dig_many(self.visible.safe)
+        self.visible.safe.clear()
+        return safe
     
     def help(self):
+        if not self.board_data.generated:
+            self.board_data.generate()
         for r in range(self.rows):
             for c in range(self.columns):
                 if self.board_data.board[r][c] != 0:
@@ -197,98 +302,124 @@ class Game():
                 return
 
 def posizione_a_indici(posizione):
-    """Calcola gli indici del quadrato corrispondente alla posizione del mouse"""
-    global window_data
+    """Calcola gli indici del quadrato corrispondente alla posizione del mouse (None se fuori dalla griglia)"""
+    return camera.cell_at(posizione)
 
-    x, y = posizione
-    riga = y // (window_data['height']/game_data['rows'])
-    colonna = x // (window_data['width']/game_data['columns'])
-    return int(riga), int(colonna)
 
+def tessera(riga, colonna):
+    """Tessera dell'atlante da usare per la cella"""
+    return 'safe' if (riga, colonna) in game.visible.safe else game.visible.board[riga][colonna]
+
+
+def prepara_grafica():
+    """Ricostruisce atlante e griglia fuori schermo quando cambia la dimensione delle celle"""
+    global atlas, tavola
+    if atlas is not None and atlas.cell_size == camera.cell_size:
+        return
+    atlas = SpriteAtlas(camera.cell_size, number_colors, colors['black'], colors['black'])
+    tavola = None
+    if BoardSurface.fits(game.rows, game.columns, camera.cell_size):
+        tavola = BoardSurface(atlas, game.rows, game.columns)
+        tavola.redraw(tessera)
 
-def disegna_griglia_con_numeri(griglia):
-    """Disegna la griglia con i numeri/caratteri corrispondenti"""
-    global window
-    rows = len(griglia)
-    columns = len(griglia[0])
 
-    cell_width = window_data['width'] / columns
-    cell_height = window_data['height'] / rows
+def disegna_cella(griglia, riga, colonna):
+    """Disegna una sola cella sulla finestra e restituisce il rettangolo che ha cambiato"""
+    rettangolo = camera.cell_rect(riga, colonna)
+    atlas.blit(window, tessera(riga, colonna), rettangolo.topleft)
+    return rettangolo
 
-    for riga in range(rows):
-        for colonna in range(columns):
-            x = colonna * cell_width
-            y = riga * cell_height
-            rettangolo_bordo = pygame.Rect(x, y, cell_width,cell_height)
-            rettangolo_riempimento = pygame.Rect(x+2, y+2, cell_width,cell_height-2)
-            #pygame.draw.rect(window, colors['black'], rettangolo, 1)  # disegna il bordo del rettangolo
-            # Disegna il bordo del rettangolo
-            pygame.draw.rect(window, colors['black'], rettangolo_bordo)
 
-            # Riempimento del rettangolo con un colore diverso (es. verde)
-            pygame.draw.rect(window, colors['black'] if (riga, colonna) in game.visible.safe else number_colors[griglia[riga][colonna]], rettangolo_riempimento)
+def disegna_griglia_con_numeri(griglia, celle=()):
+    """Disegna la parte di griglia che cade nella finestra, con i numeri/caratteri corrispondenti.
 
-            # Aggiungi il numero/carattere al centro del quadrato
-            font = pygame.font.Font(None, 36)  # Imposta il font e la dimensione del testo
-            testo = font.render(str(griglia[riga][colonna] if griglia[riga][colonna] != None else " "), True, colors['black'])  # Crea il testo
-            testo_rettangolo = testo.get_rect(center=(x + cell_width // 2, y + cell_height // 2))
-            window.blit(testo, testo_rettangolo)
+    celle sono le celle cambiate dall'ultimo frame: vanno riportate sulla griglia
+    fuori schermo prima di copiarla, altrimenti si vedrebbe quella vecchia.
+    """
+    global window
+    prepara_grafica()
+    if tavola is not None:
+        tavola.update(celle, tessera)
+        tavola.blit_to(window, camera)
+        return
+
+    # griglia troppo grande per tenerla tutta in memoria: una tessera per ogni cella in vista
+    r0, r1, c0, c1 = camera.visible_range()
+    for riga in range(r0, r1):
+        for colonna in range(c0, c1):
+            disegna_cella(griglia, riga, colonna)
+
+
+def disegna_celle(griglia, celle):
+    """Aggiorna solo le celle indicate e restituisce i rettangoli dello schermo da passare a display.update"""
+    prepara_grafica()
+    celle = set(celle)
+    r0, r1, c0, c1 = camera.visible_range()
+    in_vista = [(riga, colonna) for riga, colonna in celle if r0 <= riga < r1 and c0 <= colonna < c1]
+    if tavola is None:
+        return [disegna_cella(griglia, riga, colonna) for riga, colonna in in_vista]
+
+    tavola.update(celle, tessera)
+    if len(in_vista) * camera.cell_size ** 2 < camera.width * camera.height:
+        # solo i rettangoli cambiati, non tutta la parte inquadrata
+        return tavola.blit_cells(window, camera, in_vista)
+    # tante celle da coprire la finestra: un solo blit costa meno
+    tavola.blit_to(window, camera)
+    return [camera.cell_rect(riga, colonna) for riga, colonna in in_vista]
 
 
 def Bot(visible):
-    def get_intorno(t):
-        x = t[0]
-        y = t[1]
-        s = set()
-        for a in range(max(0,x-1), min(x+2,visible.rows)):
-            for b in range(max(0,y-1), min(y+2,visible.columns)):
-                s.add((a,b))
-        return s
-    
-    def get_intorno_vuote(t):
-        return get_intorno(t)-visible.dug
+    # celle come indici piatti, vicini presi dalla tabella precalcolata per questa forma di griglia
+    vicini = neighbor_table(visible.rows, visible.columns)
+    columns = visible.columns
+    dug = visible.dug.bits
+    flags = visible.flags.bits
+
+    def valore(i):
+        return visible.board[i // columns][i % columns]
 
-    def conta_intorno_vuote(t):
-        return len(get_intorno_vuote(t))
+    def get_intorno_vuote(i):
+        return [n for n in vicini.around(i) if not dug[n]]
 
-    def get_intorno_bombe(t):
-        return get_intorno(t) & visible.flags
+    def conta_intorno_vuote(i):
+        return len(get_intorno_vuote(i))
 
-    def conta_intorno_bombe(t):
-        return len(get_intorno_bombe(t))
+    def get_intorno_bombe(i):
+        return [n for n in vicini.around(i) if flags[n]]
 
+    def conta_intorno_bombe(i):
+        return len(get_intorno_bombe(i))
+
+    # solo i numeri della frontiera possono dare qualcosa di nuovo
     def flag_all_obvious():
-        for cor in visible.dug:
-            assert (type(visible.board[cor[0]][cor[1]]) == int, "Cosa sea sta roba?")
-            if visible.board[cor[0]][cor[1]] == 0:
+        nonlocal n_flagged
+        for cor in sorted(visible.frontier.numbers):
+            assert type(valore(cor)) == int, "Cosa sea sta roba?"
+            if valore(cor) == 0:
                 continue
-            if visible.board[cor[0]][cor[1]] == conta_intorno_vuote(cor):
-                visible.flag(get_intorno_vuote(cor))
-                n_flagged = 1
+            if valore(cor) == conta_intorno_vuote(cor):
+                if visible.flag_ids(get_intorno_vuote(cor)):
+                    n_flagged = 1
 
     def dig_all_obvious():
-        b = 0
-        for cor in visible.dug:
-            assert (type(visible.board[cor[0]][cor[1]]) == int, "Cosa sea sta roba?")
-            if visible.board[cor[0]][cor[1]] == 0:
+        nonlocal n_digged
+        safe = visible.safe.bits
+        for cor in sorted(visible.frontier.numbers):
+            assert type(valore(cor)) == int, "Cosa sea sta roba?"
+            if valore(cor) == 0:
                 continue
-            if visible.board[cor[0]][cor[1]] == conta_intorno_bombe(cor):
-                if conta_intorno_vuote(cor) != 0:
-                    visible.safe = visible.safe | (get_intorno_vuote(cor) - get_intorno_bombe(cor))
+            if valore(cor) == conta_intorno_bombe(cor):
+                nuove = [n for n in get_intorno_vuote(cor) if not flags[n] and not safe[n]]
+                if nuove:
+                    visible.safe.add_flat(nuove)
                     n_digged = 1
     
     def bruteforce():
-        board = [[None for c in range(visible.columns)] for r in range(visible.rows)]
-        for cor in visible.dug:
-            if visible.board[cor[0]][cor[1]] == 0:
-                continue
-            if visible.board[cor[0]][cor[1]] == conta_intorno_bombe(cor)-1:
-                clear = get_intorno(cor)-visible.dug-visible.flags
-                if len(clear) == 2:
-                    num = cor[0]*visible.rows+cor[1]
-                    for c in clear:
-                        board[c[0]][c[1]] = num
-        pass
+        # regole semplici esaurite: si enumerano tutte le soluzioni di ogni componente della frontiera
+        sicure, bombe = exhaustive_ids(visible.board, visible.rows, visible.columns, visible.flags.ids(),
+                                       visible.safe.ids(), numbers=sorted(visible.frontier.numbers))
+        visible.safe.add_flat(sorted(sicure))
+        visible.flag_ids(sorted(bombe))
 
     
     n_flagged = 0
@@ -296,8 +427,7 @@ def Bot(visible):
 
     flag_all_obvious()
     if n_flagged == 0: dig_all_obvious()
-    if n_digged == 0: bruteforce()
-
+    if n_flagged == 0 and n_digged == 0: bruteforce()
 
 colors = {
     'black'  : (  0,   0,   0),
@@ -329,6 +459,10 @@ number_colors = {
 
 }
 
+# tessere delle celle e griglia fuori schermo, rifatte quando cambia la dimensione delle celle
+atlas = None
+tavola = None
+
 symbols = {
     'mine'  : "*",
     'flag'  : "F",
@@ -350,24 +484,45 @@ if __name__ == '__main__':
     window = pygame.display.set_mode((window_data['width'], window_data['height']))
     pygame.display.set_caption("MineSweeper")
 
-    game = Game(game_data['rows'],game_data['columns'],game_data['bombs'])
+    game = Game(game_data['rows'],game_data['columns'],game_data['bombs'], lazy=True)
+    # rotellina o +/- per lo zoom, frecce o tasto centrale trascinato per spostarsi
+    camera = Camera(window_data['width'], window_data['height'], game_data['rows'], game_data['columns'])
 
     running = True
 
+    window.fill(colors['white'])
+    disegna_griglia_con_numeri(game.visible.board)
+    pygame.display.update()
+    game.visible.take_dirty()
+
     while running:
+        ridisegna_tutto = False
 
-        for event in pygame.event.get():
+        # se non c'e' nessun evento in coda si aspetta il prossimo senza consumare CPU
+        for event in pygame.event.get() or [pygame.event.wait()]:
             if event.type == pygame.QUIT:
                 running = False
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                ridisegna_tutto = True
+            if event.type == pygame.MOUSEWHEEL:
+                camera.zoom(4 * event.y, pygame.mouse.get_pos())
+                ridisegna_tutto = True
+            if event.type == pygame.MOUSEMOTION and event.buttons[1]:
+                camera.pan(-event.rel[0], -event.rel[1])
+                ridisegna_tutto = True
             if event.type == pygame.MOUSEBUTTONDOWN:
                 posizione_mouse = pygame.mouse.get_pos()
-                x, y = posizione_a_indici(posizione_mouse)
+                cella = posizione_a_indici(posizione_mouse)
+                if cella is None:
+                    continue
+                x, y = cella
 
                 # Rileva il tasto del mouse premuto
                 if event.button == 1:  # Tasto sinistro del mouse
                     print("Tasto sinistro del mouse premuto a posizione:", posizione_mouse)
                     print(posizione_a_indici(posizione_mouse))
-                    safe = game.dig(x, y)
+                    # su un numero gia' scoperto il click apre tutti i vicini senza bandierina
+                    safe = game.chord(x, y) if (x, y) in game.visible.dug else game.dig(x, y)
                     if safe == False:
                         running = False
                         print("You lost!")
@@ -376,46 +531,51 @@ if __name__ == '__main__':
                         print("You won!")
                 elif event.button == 3:  # Tasto destro del mouse
                     print("Tasto destro del mouse premuto a posizione:", posizione_mouse)
-                    if (x,y) in game.visible.flags:
-                        game.visible.unflag((x,y))
-                    else:
-                        game.visible.flag((x, y))
-                    game.update_visible()
+                    game.toggle_flag(x, y)
 
             # Rileva l'evento di premere un tasto
             elif event.type == pygame.KEYDOWN:
                 posizione_mouse = pygame.mouse.get_pos()
-                x, y = posizione_a_indici(posizione_mouse)
+                cella = posizione_a_indici(posizione_mouse)
+                passo = 5 * camera.cell_size
+                if event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+                    camera.pan(passo * ((event.key == pygame.K_RIGHT) - (event.key == pygame.K_LEFT)),
+                               passo * ((event.key == pygame.K_DOWN) - (event.key == pygame.K_UP)))
+                    ridisegna_tutto = True
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS, pygame.K_MINUS, pygame.K_KP_MINUS):
+                    camera.zoom(4 if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS) else -4, posizione_mouse)
+                    ridisegna_tutto = True
                 # Se il tasto premuto è la freccia sinistra, cambia il colore del rettangolo
-                if event.key == pygame.K_d or event.key == pygame.K_c:
+                if (event.key == pygame.K_d or event.key == pygame.K_c) and cella is not None:
+                    x, y = cella
                     print("Tasto sinistro del mouse premuto a posizione:", posizione_mouse)
                     print(posizione_a_indici(posizione_mouse))
-                    safe = game.dig(x, y)
+                    # su un numero gia' scoperto il click apre tutti i vicini senza bandierina
+                    safe = game.chord(x, y) if (x, y) in game.visible.dug else game.dig(x, y)
                     if safe == False:
                         running = False
                         print("You lost!")
                     elif game.won:
                         running = False
                         print("You won!")
-                if event.key == pygame.K_f or event.key == pygame.K_x:
+                if (event.key == pygame.K_f or event.key == pygame.K_x) and cella is not None:
+                    x, y = cella
                     print("Tasto destro del mouse premuto a posizione:", posizione_mouse)
-                    if (x,y) in game.visible.flags:
-                        game.visible.unflag((x,y))
-                    else:
-                        game.visible.flag((x, y))
-                    game.update_visible()
+                    game.toggle_flag(x, y)
                 if event.key == pygame.K_b:
                     Bot(game.visible)
                     game.dig_safe()
-                    game.update_visible()
                 if event.key == pygame.K_h:
                     game.help()
-                    game.update_visible()    
-
-        window.fill(colors['white'])
-        disegna_griglia_con_numeri(game.visible.board)
 
-        pygame.display.update()
+        # solo le celle cambiate da dig/flag vengono ridisegnate e mandate allo schermo
+        celle = game.visible.take_dirty()
+        if ridisegna_tutto or len(celle) > game.rows * game.columns // 4:
+            window.fill(colors['white'])
+            disegna_griglia_con_numeri(game.visible.board, celle)
+            pygame.display.update()
+        elif celle:
+            pygame.display.update(disegna_celle(game.visible.board, celle))
 
     pygame.quit()
 
@@ -12,175 +12,119 @@ Programmer Beast Mode Spotify playlist: https://open.spotify.com/playlist/4Akns5
 Project specs, files, code all over the place? Start using Backlog for efficient management!! There is a free tier: https://cutt.ly/ehxImv5
 """
 
-import random
 import re
+import numpy as np
 import pygame
 
+from cell_mask import CellMask
+from frontier import Frontier
+from rendering import GlyphCache
+from solver import ProbabilityEngine, Solver
+from game_trace import TraceRecorder
+from text_render import TextRenderer
+from board_engine import Minefield, neighbor_table
+
 # lets create a board object to represent the minesweeper game
 # this is so that we can just say "create a new board object", or
 # "dig here", or "render this game for this object"
-class Board:
-    def __init__(self, dim_size, num_bombs):
-        # let's keep track of these parameters. they'll be helpful later
-        self.dim_size = dim_size
-        self.num_bombs = num_bombs
-
-        # let's create the board
-        # helper function!
-        self.board = self.make_new_board() # plant the bombs
-        self.assign_values_to_board()
-
-        # initialize a set to keep track of which locations we've uncovered
-        # we'll save (row,col) tuples into this set 
-        # if we dig at 0, 0, then self.dug = {(0,0)}
-
-    def make_new_board(self):
-        # construct a new board based on the dim size and num bombs
-        # we should construct the list of lists here (or whatever representation you prefer,
-        # but since we have a 2-D board, list of lists is most natural)
-
-        # generate a new board
-        board = [[None for _ in range(self.dim_size)] for _ in range(self.dim_size)]
-        # this creates an array like this:
-        # [[None, None, ..., None],
-        #  [None, None, ..., None],
-        #  [...                  ],
-        #  [None, None, ..., None]]
-        # we can see how this represents a board!
-
-        # plant the bombs
-        bombs_planted = 0
-        while bombs_planted < self.num_bombs:
-            loc = random.randint(0, self.dim_size**2 - 1) # return a random integer N such that a <= N <= b
-            row = loc // self.dim_size  # we want the number of times dim_size goes into loc to tell us what row to look at
-            col = loc % self.dim_size  # we want the remainder to tell us what index in that row to look at
-
-            if board[row][col] == '*':
-                # this means we've actually planted a bomb there already so keep going
-                continue
-
-            board[row][col] = '*' # plant the bomb
-            bombs_planted += 1
-
-        return board
-
-    def assign_values_to_board(self):
-        # now that we have the bombs planted, let's assign a number 0-8 for all the empty spaces, which
-        # represents how many neighboring bombs there are. we can precompute these and it'll save us some
-        # effort checking what's around the board later on :)
-        for r in range(self.dim_size):
-            for c in range(self.dim_size):
-                if self.board[r][c] == '*':
-                    # if this is already a bomb, we don't want to calculate anything
-                    continue
-                self.board[r][c] = self.get_num_neighboring_bombs(r, c)
-
-    def get_num_neighboring_bombs(self, row, col):
-        # let's iterate through each of the neighboring positions and sum number of bombs
-        # top left: (row-1, col-1)
-        # top middle: (row-1, col)
-        # top right: (row-1, col+1)
-        # left: (row, col-1)
-        # right: (row, col+1)
-        # bottom left: (row+1, col-1)
-        # bottom middle: (row+1, col)
-        # bottom right: (row+1, col+1)
-
-        # make sure to not go out of bounds!
-
-        num_neighboring_bombs = 0
-        for r in range(max(0, row-1), min(self.dim_size-1, row+1)+1):
-            for c in range(max(0, col-1), min(self.dim_size-1, col+1)+1):
-                if r == row and c == col:
-                    # our original location, don't check
-                    continue
-                if self.board[r][c] == '*':
-                    num_neighboring_bombs += 1
-
-        return num_neighboring_bombs
-
+# bombs, numbers and regions of 0s come from board_engine.Minefield, the same core
+# used by Minesweeper-gui.py and simulate.py; boards can be rows x columns
+class Board(Minefield):
+    def __init__(self, rows, columns, num_bombs, seed=None, lazy=False):
+        # with lazy=True the bombs are planted on the first dig instead, see generate_around
+        # (it keeps that cell and its neighbours free of bombs, so the opening cascades)
+        super().__init__(rows, columns, num_bombs, seed, lazy)
+
+    @property
+    def num_bombs(self):
+        return self.n_bombs
 
     def __str__(self):
         # this is a magic function where if you call print on this object,
         # it'll print out what this function returns!
-        # return a string that shows the board to the player
-
-        # first let's create a new array that represents what the user would see
-        visible_board = [[None for _ in range(self.dim_size)] for _ in range(self.dim_size)]
-        for row in range(self.dim_size):
-            for col in range(self.dim_size):
-                if (row,col) in self.dug:
-                    visible_board[row][col] = str(self.board[row][col])
-                else:
-                    visible_board[row][col] = ' '
-        
-        for cor in flag:
-            visible_board[cor[0]][cor[1]] = '*'
-        
-        # put this together in a string
-        string_rep = ''
-        # get max column widths for printing
-        widths = []
-        for idx in range(self.dim_size):
-            columns = map(lambda x: x[idx], visible_board)
-            widths.append(
-                len(
-                    max(columns, key = len)
-                )
-            )
-
-        # print the csv strings
-        indices = [i for i in range(self.dim_size)]
-        indices_row = '   '
-        cells = []
-        for idx, col in enumerate(indices):
-            format = '%-' + str(widths[idx]) + "s"
-            cells.append(format % (col))
-        indices_row += '  '.join(cells)
-        indices_row += '  \n'
-        
-        for i in range(len(visible_board)):
-            row = visible_board[i]
-            string_rep += f'{i} |'
-            cells = []
-            for idx, col in enumerate(row):
-                format = '%-' + str(widths[idx]) + "s"
-                cells.append(format % (col))
-            string_rep += ' |'.join(cells)
-            string_rep += ' |\n'
-
-        str_len = int(len(string_rep) / self.dim_size)
-        string_rep = indices_row + '-'*str_len + '\n' + string_rep + '-'*str_len
-
-        return string_rep
-
-    def visible(self):
-        # this is a magic function where if you call print on this object,
-        # it'll print out what this function returns!
-        # return a string that shows the board to the player
-
-        # first let's create a new array that represents what the user would see
-        visible_board = [[None for _ in range(self.dim_size)] for _ in range(self.dim_size)]
-        for row in range(self.dim_size):
-            for col in range(self.dim_size):
-                if (row,col) in self.dug:
-                    visible_board[row][col] = self.board[row][col]
-                else:
-                    visible_board[row][col] = None
-        return visible_board
+        # the board itself has no idea of what was dug, so it shows everything
+        # (that's what we print at game over); Game.__str__ shows what the player sees
+        if not self.generated:
+            return TextRenderer(self.rows, self.columns, lambda row, col: ' ').render()
+        return TextRenderer(self.rows, self.columns, lambda row, col: str(self.board[row][col])).render()
 
 
 class Game:
     def __init__(self,board):
 
-        self.flags = set()
-        self.dug = set()
+        # one byte per cell instead of a set of (row, col) tuples
+        self.flags = CellMask(board.rows, board.columns)
+        self.dug = CellMask(board.rows, board.columns)
 
         self.board_data = board
+
+        # text rows are cached: dig and flag only mark the rows they touch
+        self.text = TextRenderer(board.rows, board.columns, self.cell_text)
+
+        # what the player sees, as the bots and the pygame views want it (see game_data):
+        # kept up to date cell by cell instead of being rebuilt on every move
+        self.visible = [[None] * board.columns for _ in range(board.rows)]
+
+        # revealed numbers with unknown neighbours and unknown cells next to a number,
+        # kept up to date by dig and flag so the bot doesn't rescan the whole board
+        self.frontier = Frontier(board.rows, board.columns)
+
+        # optional game_trace.TraceRecorder: every dig and flag is logged to it
+        self.trace = None
+
+    def sync(self):
+        # dug or flags were replaced wholesale (e.g. a replay snapshot): rebuild what depends on them
+        numbered = ~self.board_data.mines & (self.board_data.counts > 0)
+        self.frontier.rebuild(self.dug.array, self.flags.array, numbered)
+        self.text.invalidate_all()
+        self.update_visible()
+
+    def update_visible(self, ids=None):
+        # refresh the cells (flat ids) of the visible board: '*' for a flag, the number if dug
+        columns = self.board_data.columns
+        if ids is None:
+            # the whole board at once with NumPy, e.g. after a replay restore
+            values = np.full(self.board_data.rows * columns, None, dtype=object)
+            if self.board_data.generated:
+                revealed = self.board_data.board.values.ravel().astype(object)
+                revealed[revealed == -1] = '*'
+                values[self.dug.array] = revealed[self.dug.array]
+            values[self.flags.array] = '*'
+            self.visible = values.reshape(-1, columns).tolist()
+            return
+        flags = self.flags.bits
+        dug = self.dug.bits
+        values = self.board_data.board.values.ravel() if self.board_data.generated else None
+        for cell in ids:
+            if flags[cell]:
+                value = '*'
+            elif dug[cell]:
+                value = int(values[cell])
+                value = '*' if value < 0 else value
+            else:
+                value = None
+            self.visible[cell // columns][cell % columns] = value
+
+    def cell_text(self, row, col):
+        if (row, col) in self.flags:
+            return '*'
+        if (row, col) in self.dug:
+            return str(self.board_data.board[row][col])
+        return ' '
+
+    def __str__(self):
+        return self.text.render()
     
     def dig(self, row, col):
         # dig at that location!
         # return True if successful dig, False if bomb dug
+        before = len(self.dug)
+        safe = self.uncover(row, col)
+        if self.trace is not None:
+            self.trace.dig(row * self.board_data.columns + col, len(self.dug) - before)
+        return safe
+
+    def uncover(self, row, col):
 
         # a few scenarios:
         # hit a bomb -> game over
@@ -191,52 +135,74 @@ class Game:
             check = input("R U SURE? [Y/n]")
             if check == "n" or check == "N":
                 return True
-            self.flags.remove((row, col))
-
-        # Initialize a stack for iterative approach
-        stack = [(row, col)]
-        
-        while stack:
-            current_row, current_col = stack.pop()
-            self.dug.add((current_row, current_col))  # keep track that we dug here
-            
-            if self.board_data.board[current_row][current_col] == '*':
-                # Hit a bomb, game over
-                return False
-            elif self.board_data.board[current_row][current_col] > 0:
-                # Hit a cell with neighboring bombs, continue
-                continue
-            
-            # self.board[current_row][current_col] == 0
-            for r in range(max(0, current_row-1), min(self.board_data.dim_size-1, current_row+1)+1):
-                for c in range(max(0, current_col-1), min(self.board_data.dim_size-1, current_col+1)+1):
-                    if (r, c) in self.dug:
-                        continue  # skip cells already dug
-                    stack.append((r, c))
-
-        # If our initial dig didn't hit a bomb, we *shouldn't* hit a bomb here
+            self.flags.discard((row, col))
+            self.frontier.unflag([row * self.board_data.columns + col])
+            self.text.invalidate([(row, col)])
+            self.update_visible([row * self.board_data.columns + col])
+
+        if not self.board_data.generated:
+            self.board_data.generate_around(row, col)
+
+        if self.board_data.board[row][col] == '*':
+            # Hit a bomb, game over
+            self.dug.add((row, col))
+            self.frontier.reveal([row * self.board_data.columns + col], [False])
+            self.text.invalidate([(row, col)])
+            self.update_visible([row * self.board_data.columns + col])
+            return False
+
+        region = self.board_data.regions.region_of(row * self.board_data.columns + col)
+        if region < 0:
+            # Hit a cell with neighboring bombs, only this one is dug
+            self.dug.add((row, col))
+            self.frontier.reveal([row * self.board_data.columns + col], [True])
+            self.text.invalidate([(row, col)])
+            self.update_visible([row * self.board_data.columns + col])
+            return True
+
+        # a 0: the whole connected region of 0s and its border was precomputed, dig it in one go
+        cells = self.board_data.regions.region_cells(region)
+        self.dug.add_flat(cells)
+        self.frontier.reveal(cells, self.board_data.counts.ravel()[cells] > 0)
+        self.text.invalidate_flat(cells)
+        self.update_visible(cells.tolist())
         return True
 
     def flag(self, row, col):
         self.flags.add((row,col))
+        self.frontier.flag([row * self.board_data.columns + col])
+        self.text.invalidate([(row, col)])
+        self.update_visible([row * self.board_data.columns + col])
+        if self.trace is not None:
+            self.trace.flag(row * self.board_data.columns + col)
+
+    def unflag(self, row, col):
+        self.flags.discard((row, col))
+        self.frontier.unflag([row * self.board_data.columns + col])
+        self.text.invalidate([(row, col)])
+        self.update_visible([row * self.board_data.columns + col])
+        if self.trace is not None:
+            self.trace.unflag(row * self.board_data.columns + col)
         
     def game_data(self):
-        return [['*' if (i, j) in self.flags else cell if (i, j) in self.dug else None for j, cell in enumerate(row)] for i, row in enumerate(self.board_data.board)]
+        # the live visible board: read it, don't modify it
+        return self.visible
     
     def won(self):
-        return len(self.dug) == self.board_data.dim_size**2 - self.board_data.num_bombs
+        return len(self.dug) == self.board_data.rows * self.board_data.columns - self.board_data.num_bombs
 
     @classmethod
-    def new(cls, dim_size, num_bombs):
-        return cls(Board(dim_size, num_bombs))
+    def new(cls, rows, columns, num_bombs, seed=None, lazy=False):
+        return cls(Board(rows, columns, num_bombs, seed, lazy))
 
 
 
 
 # play the game
-def play(dim_size=10, num_bombs=10):
+def play(rows=10, columns=10, num_bombs=10):
     # Step 1: create the board and plant the bombs
-    board = Board(dim_size, num_bombs)
+    game = Game.new(rows, columns, num_bombs)
+    board = game.board_data
 
     # Step 2: show the user the board and ask for where they want to dig
     # Step 3a: if location is a bomb, show game over message
@@ -245,17 +211,17 @@ def play(dim_size=10, num_bombs=10):
     # Step 4: repeat steps 2 and 3a/b until there are no more places to dig -> VICTORY!
     safe = True 
 
-    while len(board.dug) < board.dim_size ** 2 - num_bombs:
-        print(board)
+    while len(game.dug) < rows * columns - num_bombs:
+        print(game)
         # 0,0 or 0, 0 or 0,    0
         user_input = re.split(',(\\s)*', input("Where would you like to dig? Input as row,col: "))  # '0, 3'
         row, col = int(user_input[0]), int(user_input[-1])
-        if row < 0 or row >= board.dim_size or col < 0 or col >= dim_size:
+        if row < 0 or row >= rows or col < 0 or col >= columns:
             print("Invalid location. Try again.")
             continue
 
         # if it's valid, we dig
-        safe = board.dig(row, col)
+        safe = game.dig(row, col)
         if not safe:
             # dug a bomb ahhhhhhh
             break # (game over rip)
@@ -266,41 +232,45 @@ def play(dim_size=10, num_bombs=10):
     else:
         print("SORRY GAME OVER :(")
         # let's reveal the whole board!
-        board.dug = [(r,c) for r in range(board.dim_size) for c in range(board.dim_size)]
         print(board)
 
 
 
-def bot_play(dim_size=100, num_bombs=1000):
+def bot_play(rows=100, columns=100, num_bombs=1000, trace_path='bot_play.trace'):
     # Step 1: create the board and plant the bombs
-    board = Board(dim_size, num_bombs)
-    
-    # Step 2: show the user the board and ask for where they want to dig
+    game = Game.new(rows, columns, num_bombs, lazy=True)
+    board = game.board_data
+
+    # every move goes to a compact binary trace; replay it with
+    # python game_trace.py bot_play.trace --move N
+    game.trace = TraceRecorder(trace_path, rows, columns, num_bombs, board.seed, lazy=True)
+
+    # Step 2: let the bot pick where to dig
     # Step 3a: if location is a bomb, show game over message
     # Step 3b: if location is not a bomb, dig recursively until each square is at least
     #          next to a bomb
     # Step 4: repeat steps 2 and 3a/b until there are no more places to dig -> VICTORY!
     safe = True 
 
-    while len(board.dug) < board.dim_size ** 2 - num_bombs:
-        print(board)
-        print (num_bombs-len(flag))
-        add_line_to_file(str(board), "C:\\Users\\zampr\\Desktop\\DATI.txt")
-        # 0,0 or 0, 0 or 0,    0
-
-        row, col = bot(board.visible(), num_bombs-len(flag))
+    with game.trace:
+        while len(game.dug) < rows * columns - num_bombs:
+            print(game)
+            print (num_bombs-len(game.flags))
 
-        print(f'{row} - {col}')
+            # the bot adds the bombs it finds to a set of flat ids, so the new ones go through game.flag
+            flags = set(game.flags.ids())
+            row, col = bot(game.game_data(), num_bombs-len(game.flags), flags, sorted(game.frontier.numbers),
+                           ~(game.dug.array | game.flags.array))
+            for cell in sorted(flags.difference(game.flags.ids())):
+                game.flag(*divmod(cell, columns))
 
-        if row < 0 or row >= board.dim_size or col < 0 or col >= dim_size:
-            print("Invalid location. Try again.")
-            continue
+            print(f'{row} - {col}')
 
-        # if it's valid, we dig
-        safe = board.dig(row, col)
-        if not safe:
-            # dug a bomb ahhhhhhh
-            break # (game over rip)
+            # if it's valid, we dig
+            safe = game.dig(row, col)
+            if not safe:
+                # dug a bomb ahhhhhhh
+                break # (game over rip)
 
     # 2 ways to end loop, lets check which one
     if safe:
@@ -308,113 +278,64 @@ def bot_play(dim_size=100, num_bombs=1000):
     else:
         print("SORRY GAME OVER :(")
         # let's reveal the whole board!
-        board.dug = [(r,c) for r in range(board.dim_size) for c in range(board.dim_size)]
         print(board)
 
-def bot(visible_board, remaining_bombs, flags):
-    
-    rows = len(visible_board)
-    colums = len(visible_board[0])
-    
-    for _ in range(100):
-        for cor in flags:
-            visible_board[cor[0]][cor[1]] = '*'
-
-        for r in range(rows):
-            for c in range(colums):
-                if visible_board[r][c] == None or visible_board[r][c] == 0:
-                    continue
-                
-                intorno_vuoto = intorno(visible_board,r,c,None)
-                intorno_bombe = intorno(visible_board,r,c,'*')
-
-                if visible_board[r][c] == len(intorno_bombe):
-                    if len(intorno_vuoto)>0:
-                        cor = list(intorno_vuoto)[0]
-                        return cor[0],cor[1]
-
-                if visible_board[r][c] == len(intorno_vuoto) + len(intorno_bombe):
-                    flags = flags | intorno_vuoto
-            
-    user_input = re.split(',(\\s)*', input("Where would you like to dig? Input as row,col: "))  # '0, 3'
-    r, c = int(user_input[0]), int(user_input[-1])
-    return r,c
-
-def bot_gui(game):
+# shared by bot and bot_gui: component enumerations stay cached between moves
+probability_engine = ProbabilityEngine()
 
-    visible_board = game.game_data()
-    
-    rows = len(visible_board)
-    colums = len(visible_board[0])
-    
-    for _ in range(100):
-        for cor in game.flags:
-            visible_board[cor[0]][cor[1]] = '*'
+def bot(visible_board, remaining_bombs, flags, numbers=None, covered=None):
+    # one constraint-propagation pass finds every safe cell and every forced bomb;
+    # the forced bombs are added to flags so the caller keeps them
+    # flags and numbers are flat ids (row * columns + col), the cell to dig comes back as (row, col)
+    # numbers: the frontier's revealed numbers (Game.frontier), so only those are looked at
+    # covered: mask of the covered cells without a flag, so guessing doesn't rescan the board either
+    columns = len(visible_board[0])
+    n_bombs = remaining_bombs + len(flags)
+    safe, mines = Solver(len(visible_board), columns).solve_ids(visible_board, flags, numbers)
+    flags.update(mines)
 
-        for r in range(rows):
-            for c in range(colums):
-                if visible_board[r][c] == None or visible_board[r][c] == 0:
-                    continue
-                
-                intorno_vuoto = intorno(visible_board,r,c,None)
-                intorno_bombe = intorno(visible_board,r,c,'*')
-
-                if visible_board[r][c] == len(intorno_bombe):
-                    if len(intorno_vuoto)>0:
-                        cor = list(intorno_vuoto)[0]
-                        return cor[0],cor[1]
-
-                if visible_board[r][c] == len(intorno_vuoto) + len(intorno_bombe):
-                    game.flags = game.flags | intorno_vuoto
-            
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                posizione_mouse = pygame.mouse.get_pos()
-                r, c = posizione_a_indici(posizione_mouse, altezza/dim)
-                return r,c
+    if safe:
+        return divmod(min(safe), columns)
 
-def add_line_to_file(text, full_path):
+    # nothing is certain: dig the cell with the lowest chance of being a bomb
+    cell, _ = probability_engine.best_guess_ids(visible_board, n_bombs, flags, numbers=numbers, covered=covered)
+    return divmod(cell, columns)
 
-    # Open the file in append mode or create the file if it doesn't exist
-    with open(full_path, 'a+') as file:
+def bot_gui(game):
 
-        file.write('\n')
+    visible_board = game.game_data()
+    columns = game.board_data.columns
+    numbers = sorted(game.frontier.numbers)
 
-        # Add the line with the input text
-        file.write(text)
-    
-    return
-            
+    safe, mines = Solver(game.board_data.rows, columns).solve_ids(visible_board, game.flags.ids(), numbers)
+    for cell in sorted(mines):
+        game.flag(*divmod(cell, columns))
 
+    if safe:
+        return divmod(min(safe), columns)
 
+    cell, _ = probability_engine.best_guess_ids(visible_board, game.board_data.num_bombs, set(game.flags.ids()),
+                                                numbers=numbers, covered=~(game.dug.array | game.flags.array))
+    return divmod(cell, columns)
 
 def intorno(board,row,col,number):
+    # the neighbours come from the table precomputed once per board shape
+    return {(r, c) for r, c in neighbor_table(len(board), len(board[0])).cells_around(row, col) if board[r][c] == number}
 
-    rows = len(board)
-    colums = len(board[0])
-
-    count = set()
-    for r in range(max(0, row-1), min(rows-1, row+1)+1):
-        for c in range(max(0, col-1), min(colums-1, col+1)+1):
-            if r == row and c == col:
-                # our original location, don't check
-                continue
-            if board[r][c] == number:
-                count.add((r,c))
-    return count
 
-
-def posizione_a_indici(posizione, dimensione):
-    """Calcola gli indici del quadrato corrispondente alla posizione del mouse"""
+def posizione_a_indici(posizione, dimensione, rows, columns):
+    """Calcola gli indici del quadrato corrispondente alla posizione del mouse (None se fuori dalla griglia)"""
     x, y = posizione
     riga = y // dimensione
     colonna = x // dimensione
-    return riga, colonna
+    if 0 <= riga < rows and 0 <= colonna < columns:
+        return riga, colonna
+    return None
 
 
 def disegna_griglia_con_numeri(schermo, griglia, dimensione_quadrato):
     """Disegna la griglia con i numeri/caratteri corrispondenti"""
+    glyphs.resize(dimensione_quadrato, dimensione_quadrato)
     for riga in range(len(griglia)):
         for colonna in range(len(griglia[0])):
             x = colonna * dimensione_quadrato
@@ -422,11 +343,9 @@ def disegna_griglia_con_numeri(schermo, griglia, dimensione_quadrato):
             rettangolo = pygame.Rect(x, y, dimensione_quadrato, dimensione_quadrato)
             pygame.draw.rect(schermo, nero, rettangolo, 1)  # disegna il bordo del rettangolo
 
-            # Aggiungi il numero/carattere al centro del quadrato
-            font = pygame.font.Font(None, 36)  # Imposta il font e la dimensione del testo
-            testo = font.render(str(griglia[riga][colonna] if griglia[riga][colonna] != None else " "), True, nero)  # Crea il testo
-            testo_rettangolo = testo.get_rect(center=(x + dimensione_quadrato // 2, y + dimensione_quadrato // 2))
-            schermo.blit(testo, testo_rettangolo)
+            # Aggiungi il numero/carattere al centro del quadrato (gia' renderizzato in glyphs)
+            testo, dx, dy = glyphs.get(griglia[riga][colonna])
+            schermo.blit(testo, (x + dx, y + dy))
 
 
 def gui_play(game):
@@ -440,9 +359,9 @@ def gui_play(game):
     global bianco
     global nero
 
-    # Numero di quadrati per riga e per colonna
-    numero_quadrati = dim
-    dimensione_quadrato = larghezza // numero_quadrati
+    # quadrati abbastanza piccoli da far stare nella finestra tutte le righe e tutte le colonne
+    # (almeno 1 pixel: con piu' di 1000 righe o colonne la griglia esce dalla finestra, ma non si divide per 0)
+    dimensione_quadrato = max(1, min(larghezza // game.board_data.columns, altezza // game.board_data.rows))
 
     # Creazione della finestra
     finestra = pygame.display.set_mode((larghezza, altezza))
@@ -456,12 +375,16 @@ def gui_play(game):
                 running = False
             if event.type == pygame.MOUSEBUTTONDOWN:
                 posizione_mouse = pygame.mouse.get_pos()
-                x, y = posizione_a_indici(posizione_mouse, dimensione_quadrato)
+                # con una griglia non quadrata parte della finestra resta fuori dalla griglia
+                cella = posizione_a_indici(posizione_mouse, dimensione_quadrato, game.board_data.rows, game.board_data.columns)
+                if cella is None:
+                    continue
+                x, y = cella
 
                 # Rileva il tasto del mouse premuto
                 if event.button == 1:  # Tasto sinistro del mouse
                     print("Tasto sinistro del mouse premuto a posizione:", posizione_mouse)
-                    print(posizione_a_indici(posizione_mouse, dimensione_quadrato))
+                    print(posizione_a_indici(posizione_mouse, dimensione_quadrato, game.board_data.rows, game.board_data.columns))
                     safe = game.dig(x, y)
                     if safe == False:
                         running = False
@@ -498,9 +421,9 @@ def gui_bot(game):
     global bianco
     global nero
 
-    # Numero di quadrati per riga e per colonna
-    numero_quadrati = dim
-    dimensione_quadrato = larghezza // numero_quadrati
+    # quadrati abbastanza piccoli da far stare nella finestra tutte le righe e tutte le colonne
+    # (almeno 1 pixel: con piu' di 1000 righe o colonne la griglia esce dalla finestra, ma non si divide per 0)
+    dimensione_quadrato = max(1, min(larghezza // game.board_data.columns, altezza // game.board_data.rows))
 
     # Creazione della finestra
     finestra = pygame.display.set_mode((larghezza, altezza))
@@ -519,7 +442,7 @@ def gui_bot(game):
                 # Rileva il tasto del mouse premuto
                 if event.button == 3:  # Tasto sinistro del mouse
                     print("Tasto sinistro del mouse premuto a posizione:", posizione_mouse)
-                    print(posizione_a_indici(posizione_mouse, dimensione_quadrato))
+                    print(posizione_a_indici(posizione_mouse, dimensione_quadrato, game.board_data.rows, game.board_data.columns))
                     safe = game.dig(x, y)
                     if safe == False:
                         running = False
@@ -548,10 +471,13 @@ bomb = 10
 nero = (0, 0, 0)
 bianco = (255, 255, 255)
 
+# cell texts, rendered once per cell size instead of once per cell per frame
+glyphs = GlyphCache(nero)
+
 
 if __name__ == '__main__': # good practice :)
 
-    ##game = Game.new(dim,bomb)
+    ##game = Game.new(dim,dim,bomb)
 
     bot_play()
 
@@ -0,0 +1,199 @@
+"""
+Micro-benchmark: celle come tuple (riga, colonna) contro indici piatti.
+
+Misura gli stessi tre lavori nei due modi:
+  - giro dei vicini: contare le bombe attorno ad ogni cella
+  - flood fill: scoprire la regione attorno a uno zero, come un dig
+  - solver: la coda di Solver scritta con le tuple contro Solver.solve_ids
+
+Per ogni lavoro riporta in JSON il tempo migliore su --repeat ripetizioni e
+quante volte gli indici piatti sono piu' veloci.
+
+    python bench_cell_ids.py --rows 300 --columns 300 --mines 9000 --seed 1
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from board_engine import Minefield, neighbor_table
+from solver import Solver
+
+
+def best_time(function, repeat):
+    """Tempo migliore su repeat chiamate di function, e il suo ultimo risultato"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def count_tuples(rows, columns, table, bombs):
+    """Bombe attorno ad ogni cella; bombs e' un set di (riga, colonna)"""
+    total = 0
+    for r in range(rows):
+        for c in range(columns):
+            for cell in table.cells_around(r, c):
+                if cell in bombs:
+                    total += 1
+    return total
+
+
+def count_ids(rows, columns, table, mines):
+    """Come count_tuples; mines e' una lista di bool indicizzata con gli indici piatti"""
+    around = table.around
+    total = 0
+    for i in range(rows * columns):
+        for n in around(i):
+            if mines[n]:
+                total += 1
+    return total
+
+
+def flood_tuples(table, counts, start):
+    """Celle scoperte da un dig su start; counts e' l'array rows x columns dei numeri"""
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        r, c = queue.popleft()
+        if counts[r][c]:
+            continue
+        for cell in table.cells_around(r, c):
+            if cell not in seen:
+                seen.add(cell)
+                queue.append(cell)
+    return seen
+
+
+def flood_ids(table, counts, start):
+    """Come flood_tuples, con counts come lista piatta"""
+    around = table.around
+    seen = bytearray(len(counts))
+    seen[start] = 1
+    found = [start]
+    queue = deque(found)
+    while queue:
+        cell = queue.popleft()
+        if counts[cell]:
+            continue
+        for n in around(cell):
+            if not seen[n]:
+                seen[n] = 1
+                found.append(n)
+                queue.append(n)
+    return found
+
+
+def solve_tuples(board, table):
+    """Riferimento: la stessa coda di Solver.solve_ids, ma con celle (riga, colonna)"""
+    known = {}
+    numbers = [(r, c) for r, line in enumerate(board) for c, value in enumerate(line) if type(value) == int]
+    queue = deque(numbers)
+    queued = set(queue)
+
+    while queue:
+        cell = queue.popleft()
+        queued.discard(cell)
+
+        unknown = []
+        mines = 0
+        for n in table.cells_around(*cell):
+            value = board[n[0]][n[1]]
+            if type(value) == int:
+                continue
+            state = True if value == '*' else known.get(n)
+            if state is None:
+                unknown.append(n)
+            elif state:
+                mines += 1
+        if not unknown:
+            continue
+
+        left = board[cell[0]][cell[1]] - mines
+        if left == 0:
+            mine = False
+        elif left == len(unknown):
+            mine = True
+        else:
+            continue
+
+        for n in unknown:
+            known[n] = mine
+            for m in table.cells_around(*n):
+                if m not in queued and type(board[m[0]][m[1]]) == int:
+                    queue.append(m)
+                    queued.add(m)
+
+    return {cell for cell, mine in known.items() if not mine}, {cell for cell, mine in known.items() if mine}
+
+
+def visible_board(field, revealed):
+    """Griglia visibile con scoperte solo le celle revealed (indici piatti)"""
+    columns = field.columns
+    board = [[None] * columns for _ in range(field.rows)]
+    values = field.counts.ravel()
+    for cell in revealed:
+        board[cell // columns][cell % columns] = int(values[cell])
+    return board
+
+
+def run(rows, columns, n_bombs, seed=None, repeat=5):
+    field = Minefield(rows, columns, n_bombs, seed)
+    table = neighbor_table(rows, columns)
+    # si parte dallo zero con la regione piu' grande, cosi' flood fill e solver hanno lavoro
+    regions = field.regions
+    if not len(regions.offsets) > 1:
+        raise ValueError("nessuno zero sulla griglia: servono meno bombe")
+    largest = int(np.argmax(np.diff(regions.offsets)))
+    start = int(np.flatnonzero(regions.labels == largest)[0])
+    start_cell = divmod(start, columns)
+
+    results = {}
+
+    def compare(name, tuples, ids, same):
+        t_tuples, r_tuples = best_time(tuples, repeat)
+        t_ids, r_ids = best_time(ids, repeat)
+        if not same(r_tuples, r_ids):
+            raise AssertionError(f"{name}: tuple e indici piatti danno risultati diversi")
+        results[name] = {'tuples_s': t_tuples, 'ids_s': t_ids, 'speedup': t_tuples / t_ids if t_ids else None}
+
+    # le strutture di ogni rappresentazione si preparano fuori dal tempo misurato
+    bombs = field.bombs
+    mines = field.mines.ravel().tolist()
+    counts_rows = field.counts.tolist()
+    counts_flat = field.counts.ravel().tolist()
+
+    compare('neighbors', lambda: count_tuples(rows, columns, table, bombs),
+            lambda: count_ids(rows, columns, table, mines), lambda a, b: a == b)
+    compare('flood_fill', lambda: flood_tuples(table, counts_rows, start_cell), lambda: flood_ids(table, counts_flat, start),
+            lambda a, b: {r * columns + c for r, c in a} == set(b))
+
+    board = visible_board(field, flood_ids(table, counts_flat, start))
+    solver = Solver(rows, columns)
+    compare('solver', lambda: solve_tuples(board, table), lambda: solver.solve_ids(board),
+            lambda a, b: a[0] == {divmod(cell, columns) for cell in b[0]} and a[1] == {divmod(cell, columns) for cell in b[1]})
+
+    return {'rows': rows, 'columns': columns, 'mines': n_bombs, 'seed': field.seed, 'repeat': repeat, 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Confronto tra celle come tuple e come indici piatti")
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--columns', type=int, default=300)
+    parser.add_argument('--mines', type=int, default=9000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    json.dump(run(args.rows, args.columns, args.mines, args.seed, args.repeat), sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
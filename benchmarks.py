@@ -0,0 +1,271 @@
+"""
+Benchmark dei percorsi caldi del gioco grafico, con confronto tra due esecuzioni.
+
+Per ogni griglia (principiante, intermedio, esperto e giganti da 1000x1000 in
+su, a piu' densita' di bombe: le giganti anche quasi vuote, dove un solo dig
+scopre quasi tutta la griglia) si misurano:
+  - generation: creare Board_data (bombe, numeri e regioni di zeri)
+  - flood_fill: Game.dig sulla regione di zeri piu' grande
+  - solve:      Bot + dig_safe ripetuti finche' il Bot trova celle sicure
+  - render:     un frame completo di disegna_griglia_con_numeri su un display
+                finto (SDL_VIDEODRIVER=dummy), la prima volta con la
+                preparazione di atlante e griglia fuori schermo e poi a regime
+
+I risultati vanno in JSON. Con --compare si confrontano due file di risultati
+e si segnalano le misure piu' lente oltre la soglia (uscita con codice 1).
+
+    python benchmarks.py --output prima.json
+    python benchmarks.py --boards beginner expert --output dopo.json
+    python benchmarks.py --compare prima.json dopo.json --threshold 0.1
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# (nome, righe, colonne, numeri di bombe da provare)
+BOARDS = [
+    ('beginner', 9, 9, (10, 15)),
+    ('intermediate', 16, 16, (40,)),
+    ('expert', 16, 30, (60, 99, 120)),
+    ('giant', 1000, 1000, (1000, 100000, 150000)),
+    ('huge', 2000, 2000, (4000, 400000)),
+]
+BENCHMARKS = ('generation', 'flood_fill', 'solve', 'render')
+
+# da qui in su (celle) ogni misura si ripete --giant-repeat volte
+GIANT = 1000 * 1000
+WINDOW = (1000, 1000)
+
+
+def load_gui():
+    """Importa Minesweeper-gui.py (il nome col trattino non si importa con import) senza aprire finestre"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Minesweeper-gui.py')
+    spec = importlib.util.spec_from_file_location('minesweeper_gui', path)
+    gui = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gui)
+    return gui
+
+
+def cases(names=None):
+    """Griglie da misurare come (nome, righe, colonne, bombe); names filtra per 'expert' o 'expert-99'"""
+    for name, rows, columns, mines in BOARDS:
+        for n_bombs in mines:
+            case = f'{name}-{n_bombs}'
+            if names is None or name in names or case in names:
+                yield case, rows, columns, n_bombs
+
+
+def measure(run, repeat, setup=None, min_time=0.0, max_runs=1000):
+    """Chiama run(setup()) almeno repeat volte; solo run e' cronometrato. Restituisce (tempi, ultimo risultato).
+
+    Le misure brevi si ripetono finche' la somma dei tempi arriva a min_time (al
+    massimo max_runs volte): il migliore di molti campioni e' molto piu' stabile.
+    Come timeit, il garbage collector resta spento mentre run lavora.
+    """
+    times = []
+    result = None
+    while len(times) < repeat or (sum(times) < min_time and len(times) < max_runs):
+        state = setup() if setup is not None else None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = run(state)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return times, result
+
+
+def opening_cell(board_data):
+    """Prima cella della regione di zeri piu' grande, o la cella libera con il numero piu' basso"""
+    regions = board_data.regions
+    if len(regions.offsets) > 1:
+        largest = int(np.argmax(np.diff(regions.offsets)))
+        cell = int(np.flatnonzero(regions.labels == largest)[0])
+    else:
+        counts = np.where(board_data.mines, 9, board_data.counts).ravel()
+        cell = int(np.argmin(counts))
+    return divmod(cell, board_data.columns)
+
+
+def solve_all(gui, game):
+    """Fa lavorare il Bot finche' trova qualcosa; restituisce il numero di giri"""
+    rounds = 0
+    while True:
+        before = len(game.visible.dug) + len(game.visible.flags)
+        gui.Bot(game.visible)
+        game.dig_safe()
+        rounds += 1
+        if len(game.visible.dug) + len(game.visible.flags) == before:
+            return rounds
+
+
+def bench_case(gui, rows, columns, n_bombs, seed, repeat, benchmarks, min_time=0.0):
+    """Misure di una griglia: dizionario nome benchmark -> tempi e lavoro svolto"""
+    import pygame
+
+    results = {}
+
+    def record(name, times, **work):
+        results[name] = {'runs': len(times), 'best_s': min(times), 'mean_s': sum(times) / len(times), **work}
+
+    def opened():
+        game = gui.Game(rows, columns, n_bombs, seed)
+        return game, opening_cell(game.board_data)
+
+    if 'generation' in benchmarks:
+        times, _ = measure(lambda _: gui.Board_data(rows, columns, n_bombs, seed), repeat, min_time=min_time)
+        record('generation', times)
+
+    if 'flood_fill' in benchmarks:
+        def dig(state):
+            game, cell = state
+            game.dig(*cell)
+            return len(game.visible.dug)
+        times, revealed = measure(dig, repeat, opened, min_time)
+        record('flood_fill', times, cells=revealed)
+
+    game = None
+    if 'solve' in benchmarks:
+        def setup():
+            game, cell = opened()
+            game.dig(*cell)
+            return game
+        def solve(state):
+            return state, solve_all(gui, state)
+        times, (game, rounds) = measure(solve, repeat, setup, min_time)
+        record('solve', times, rounds=rounds, cells=len(game.visible.dug), flags=len(game.visible.flags))
+
+    if 'render' in benchmarks:
+        if game is None:
+            game, cell = opened()
+            game.dig(*cell)
+        # il modulo grafico disegna usando le sue variabili globali
+        gui.game = game
+        gui.window = pygame.display.set_mode(WINDOW)
+        gui.camera = gui.Camera(WINDOW[0], WINDOW[1], rows, columns)
+
+        def first_frame(_):
+            gui.atlas = gui.tavola = None
+            gui.disegna_griglia_con_numeri(game.visible.board)
+        times, _ = measure(first_frame, repeat, min_time=min_time)
+        record('render_first', times)
+        times, _ = measure(lambda _: gui.disegna_griglia_con_numeri(game.visible.board), repeat, min_time=min_time)
+        record('render', times, offscreen=gui.tavola is not None, cell_size=gui.camera.cell_size)
+    return results
+
+
+def run(names=None, benchmarks=BENCHMARKS, seed=1, repeat=5, giant_repeat=1, min_time=0.2):
+    # prima il modulo grafico, che nasconde il saluto di pygame: con l'uscita su stdout romperebbe il JSON
+    gui = load_gui()
+    import pygame
+
+    pygame.init()
+    results = []
+    for case, rows, columns, n_bombs in cases(names):
+        times = giant_repeat if rows * columns >= GIANT else repeat
+        measures = bench_case(gui, rows, columns, n_bombs, seed, times, benchmarks, min_time)
+        for benchmark, values in measures.items():
+            results.append({'board': case, 'rows': rows, 'columns': columns, 'mines': n_bombs,
+                            'density': n_bombs / (rows * columns), 'benchmark': benchmark, **values})
+    pygame.quit()
+
+    meta = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'seed': seed,
+        'repeat': repeat,
+        'giant_repeat': giant_repeat,
+        'min_time': min_time,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(old, new, threshold=0.1, min_delta=0.001):
+    """Confronta i tempi migliori di due esecuzioni.
+
+    Una misura e' una regressione se new e' piu' lento di old oltre threshold (relativo)
+    e di almeno min_delta secondi: sotto il millisecondo il rumore conta piu' del codice.
+    """
+    def index(data):
+        return {(entry['board'], entry['benchmark']): entry for entry in data['results']}
+
+    old_results, new_results = index(old), index(new)
+    rows = []
+    for key, entry in new_results.items():
+        if key not in old_results:
+            continue
+        before, after = old_results[key]['best_s'], entry['best_s']
+        ratio = after / before if before else float('inf')
+        if abs(after - before) < min_delta:
+            status = 'same'
+        else:
+            status = 'regression' if ratio > 1 + threshold else 'faster' if ratio < 1 - threshold else 'same'
+        rows.append({'board': key[0], 'benchmark': key[1], 'old_s': before, 'new_s': after, 'ratio': ratio, 'status': status})
+    missing = sorted(f'{board} {benchmark}' for board, benchmark in old_results.keys() - new_results.keys())
+    return {'threshold': threshold, 'min_delta': min_delta, 'comparisons': rows, 'missing': missing,
+            'regressions': sum(row['status'] == 'regression' for row in rows)}
+
+
+def print_comparison(report, stream=sys.stdout):
+    for row in report['comparisons']:
+        mark = {'regression': '  <-- REGRESSIONE', 'faster': '  (piu\' veloce)'}.get(row['status'], '')
+        stream.write(f"{row['board']:<22}{row['benchmark']:<14}{row['old_s']:>12.6f}{row['new_s']:>12.6f}"
+                     f"{row['ratio']:>8.2f}x{mark}\n")
+    for name in report['missing']:
+        stream.write(f"{name}: manca nella nuova esecuzione\n")
+    stream.write(f"{report['regressions']} regressioni oltre il {report['threshold']:.0%}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark di generazione, dig, Bot e disegno")
+    parser.add_argument('--boards', nargs='+', help="griglie da misurare, ad esempio 'expert' o 'giant-100000' (default: tutte)")
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5, help="ripetizioni di ogni misura (default: 5)")
+    parser.add_argument('--giant-repeat', type=int, default=1, help="ripetizioni sulle griglie da un milione di celle in su")
+    parser.add_argument('--min-time', type=float, default=0.2, help="secondi minimi cronometrati per ogni misura breve")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="confronta due file di risultati")
+    parser.add_argument('--threshold', type=float, default=0.1, help="rallentamento oltre cui segnalare una regressione")
+    parser.add_argument('--min-delta', type=float, default=0.001, help="differenza in secondi sotto cui non si segnala niente")
+    parser.add_argument('--output', help="file JSON dove salvare risultati o confronto (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as file:
+            old = json.load(file)
+        with open(args.compare[1]) as file:
+            new = json.load(file)
+        report = compare(old, new, args.threshold, args.min_delta)
+        print_comparison(report)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(report, file, indent=2)
+        return 1 if report['regressions'] else 0
+
+    data = run(args.boards, args.benchmarks, args.seed, args.repeat, args.giant_repeat, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(data, file, indent=2)
+    else:
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,345 @@
+"""
+Motore della griglia del campo minato basato su NumPy.
+
+La maschera delle mine e i numeri dei vicini sono tenuti in array NumPy,
+cosi' anche griglie da milioni di celle si preparano in pochi millisecondi.
+BoardView permette di continuare a leggere board[r][c] come con la vecchia
+lista di liste: '*' per una bomba, altrimenti il numero di bombe vicine.
+
+Le bombe si piazzano senza reinserimento con un numpy.random.Generator:
+passando lo stesso seed si ottiene sempre la stessa griglia.
+
+ZeroRegions precalcola le regioni connesse di zeri con il loro bordo di numeri,
+cosi' un dig su uno zero scopre tutta la regione in un colpo solo.
+
+NeighborTable e' la tabella dei vicini di ogni cella, calcolata una volta per
+forma di griglia (neighbor_table la tiene in cache): solver, bot e frontiera la
+usano invece di ricalcolare i limiti dell'intorno ad ogni chiamata.
+
+Minefield mette insieme tutto questo per una griglia rows x columns ed e' il
+nucleo comune di Minesweeper.Board, di Board_data in Minesweeper-gui.py e del
+simulatore.
+"""
+
+import functools
+
+import numpy as np
+
+MINE = '*'
+
+
+def new_seed():
+    """Estrae un seed casuale da salvare per poter ricostruire la griglia"""
+    return int(np.random.SeedSequence().entropy % 2**63)
+
+
+def make_rng(seed=None):
+    """Restituisce un Generator: accetta un seed, None o un Generator gia' pronto"""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def place_mines(rows, columns, n_bombs, rng=None, exclude=()):
+    """Sceglie n_bombs celle distinte in tempo O(celle), senza estrazioni ripetute.
+
+    exclude e' una sequenza di indici piatti (r * columns + c) dove non mettere bombe.
+    Restituisce la maschera booleana rows x columns delle bombe.
+    """
+    cells = rows * columns
+    rng = make_rng(rng)
+
+    if len(exclude):
+        # una maschera invece di setdiff1d, che ordinerebbe tutta la griglia
+        free = np.ones(cells, dtype=bool)
+        free[np.asarray(exclude, dtype=np.int64)] = False
+        candidates = np.flatnonzero(free)
+    else:
+        candidates = None
+
+    available = cells if candidates is None else len(candidates)
+    if not 0 <= n_bombs <= available:
+        raise ValueError(f"impossibile piazzare {n_bombs} bombe in {available} celle libere")
+
+    chosen = rng.choice(available, size=n_bombs, replace=False)
+    if candidates is not None:
+        chosen = candidates[chosen]
+
+    mines = np.zeros(cells, dtype=bool)
+    mines[chosen] = True
+    return mines.reshape(rows, columns)
+
+
+def first_click_exclusion(rows, columns, n_bombs, row, col):
+    """Indici piatti da lasciare senza bombe al primo click: la cella e il suo intorno 3x3.
+
+    Se le bombe non ci stanno si esclude solo la cella cliccata, cosi' almeno la prima mossa e' salva.
+    """
+    cell = row * columns + col
+    area = sorted(neighbor_table(rows, columns).around(cell) + [cell])
+    if rows * columns - len(area) >= n_bombs:
+        return area
+    if rows * columns - 1 >= n_bombs:
+        return [row * columns + col]
+    return []
+
+
+def neighbor_counts(mines):
+    """Conta le bombe vicine di ogni cella sommando gli 8 spostamenti di una griglia con bordo"""
+    rows, columns = mines.shape
+    padded = np.zeros((rows + 2, columns + 2), dtype=np.int8)
+    padded[1:-1, 1:-1] = mines
+
+    counts = np.zeros((rows, columns), dtype=np.int8)
+    for dr in range(3):
+        for dc in range(3):
+            if dr == 1 and dc == 1:
+                # la cella stessa non conta
+                continue
+            counts += padded[dr:dr + rows, dc:dc + columns]
+    return counts
+
+
+def shifted_slices(rows, columns, dr, dc):
+    """Fette (sa, sb) tali che griglia[sb] sia griglia[sa] spostata di (dr, dc), senza uscire dai bordi"""
+    r0, r1 = max(0, -dr), rows - max(0, dr)
+    c0, c1 = max(0, -dc), columns - max(0, dc)
+    return (slice(r0, r1), slice(c0, c1)), (slice(r0 + dr, r1 + dr), slice(c0 + dc, c1 + dc))
+
+
+class NeighborTable():
+    """Vicini di ogni cella di una griglia rows x columns, in indici piatti.
+
+    table e' un array int32 piatto con 8 posti per cella: i vicini della cella i
+    sono table[8 * i : 8 * i + counts[i]], in ordine; i posti liberi (celle sul
+    bordo) valgono rows * columns, cosi' un array con un elemento in piu' in
+    fondo si puo' indicizzare direttamente con table.
+    """
+
+    def __init__(self, rows, columns) -> None:
+        self.rows = rows
+        self.columns = columns
+        size = rows * columns
+        padded = np.full((rows + 2, columns + 2), size, dtype=np.int32)
+        padded[1:-1, 1:-1] = np.arange(size, dtype=np.int32).reshape(rows, columns)
+
+        table = np.empty((rows, columns, 8), dtype=np.int32)
+        k = 0
+        for dr in range(3):
+            for dc in range(3):
+                if dr == 1 and dc == 1:
+                    continue
+                table[:, :, k] = padded[dr:dr + rows, dc:dc + columns]
+                k += 1
+        table = table.reshape(size, 8)
+        # i posti liberi (il valore piu' grande) finiscono in fondo
+        table.sort(axis=1)
+        self.table = table.ravel()
+        self.counts = np.count_nonzero(table < size, axis=1).astype(np.int8)
+        # liste Python dei vicini, riempite la prima volta che servono
+        self.lists = [None] * size
+        self.tuples = [None] * size
+
+    def around(self, cell):
+        """Indici piatti dei vicini della cella (lista: non va modificata)"""
+        result = self.lists[cell]
+        if result is None:
+            start = 8 * cell
+            result = self.lists[cell] = self.table[start:start + int(self.counts[cell])].tolist()
+        return result
+
+    def cells_around(self, row, col):
+        """Vicini di (row, col) come tupla di (riga, colonna)"""
+        cell = row * self.columns + col
+        result = self.tuples[cell]
+        if result is None:
+            result = self.tuples[cell] = tuple(divmod(n, self.columns) for n in self.around(cell))
+        return result
+
+    def gather(self, ids):
+        """Vicini di tutte le celle in ids, in un solo array (con ripetizioni)"""
+        ids = np.asarray(ids)
+        found = self.table.reshape(-1, 8)[ids].ravel()
+        return found[found < self.rows * self.columns]
+
+
+@functools.lru_cache(maxsize=16)
+def neighbor_table(rows, columns):
+    """NeighborTable condivisa da tutte le partite con la stessa forma di griglia"""
+    return NeighborTable(rows, columns)
+
+
+class ZeroRegions():
+    """Regioni 8-connesse di zeri e celle che un dig su ciascuna deve scoprire.
+
+    Le regioni si trovano con un union-find vettoriale sui tratti orizzontali di
+    zeri: ad ogni giro ogni radice si aggancia alla radice piu' piccola di un
+    vicino, poi si comprimono i cammini dei soli tratti che cambiano ancora.
+    Le celle della regione k sono cells[offsets[k]:offsets[k+1]] (indici piatti),
+    cioe' gli zeri della regione piu' il loro bordo di numeri.
+    """
+
+    def __init__(self, mines, counts) -> None:
+        rows, columns = mines.shape
+        size = rows * columns
+        index_type = np.int32 if size < 2**31 else np.int64
+        ids = np.arange(size, dtype=index_type).reshape(rows, columns)
+        zero = ~mines & (counts == 0)
+        numbered = ~mines & ~zero
+
+        # ogni tratto orizzontale di zeri e' gia' connesso: l'union-find lavora sui tratti,
+        # numerati in ordine di griglia, invece che sulle singole celle
+        starts = zero.copy()
+        starts[:, 1:] &= ~zero[:, :-1]
+        run = (np.cumsum(starts.ravel(), dtype=np.int64) - 1).astype(index_type).reshape(rows, columns)
+        n_runs = int(starts.sum())
+
+        # tra righe vicine bastano 3 direzioni; due tratti si toccano spesso su piu'
+        # colonne di fila, quindi i doppioni consecutivi si scartano subito
+        u, v = [], []
+        for dr, dc in ((1, -1), (1, 0), (1, 1)):
+            sa, sb = shifted_slices(rows, columns, dr, dc)
+            keep = zero[sa] & zero[sb]
+            a, b = run[sa][keep], run[sb][keep]
+            new = np.ones(len(a), dtype=bool)
+            new[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+            u.append(a[new])
+            v.append(b[new])
+        u = np.concatenate(u)
+        v = np.concatenate(v)
+
+        parent = np.arange(n_runs, dtype=index_type)
+        while len(u):
+            pu, pv = parent[u], parent[v]
+            differ = pu != pv
+            u, v, pu, pv = u[differ], v[differ], pu[differ], pv[differ]
+            if not len(u):
+                break
+            np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+            # compressione dei cammini: ad ogni passo restano solo i tratti il cui padre e' cambiato
+            active = np.arange(n_runs, dtype=index_type)
+            while len(active):
+                up = parent[active]
+                grand = parent[up]
+                parent[active] = grand
+                active = active[grand != up]
+
+        # le radici (il tratto piu' in alto a sinistra di ogni regione) diventano etichette 0, 1, 2, ...
+        roots = parent == np.arange(n_runs)
+        rank = np.cumsum(roots, dtype=np.int64) - 1
+        zero_ids = np.flatnonzero(zero)
+        self.labels = np.full(size, -1, dtype=np.int64)
+        self.labels[zero_ids] = rank[parent[run.ravel()[zero_ids]]]
+        self.n_regions = int(roots.sum())
+
+        # ogni regione scopre i suoi zeri e tutte le celle numerate che li toccano
+        labels = self.labels.reshape(rows, columns)
+        region, member = [self.labels[zero_ids]], [zero_ids]
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr == 0 and dc == 0:
+                    continue
+                sa, sb = shifted_slices(rows, columns, dr, dc)
+                keep = zero[sa] & numbered[sb]
+                region.append(labels[sa][keep])
+                member.append(ids[sb][keep])
+        keys = np.concatenate(region) * size + np.concatenate(member)
+        keys.sort()
+        # un numero puo' toccare piu' zeri della stessa regione: si tiene una copia sola
+        keys = keys[np.concatenate((keys[:1] >= 0, keys[1:] != keys[:-1]))]
+
+        self.cells = keys % size
+        self.offsets = np.searchsorted(keys // size, np.arange(self.n_regions + 1))
+
+    def region_of(self, cell) -> int:
+        """Regione dello zero con indice piatto cell, -1 se la cella non e' uno zero"""
+        return int(self.labels[cell])
+
+    def region_cells(self, region):
+        return self.cells[self.offsets[region]:self.offsets[region + 1]]
+
+
+class BoardRow():
+    """Una riga di BoardView: row[c] restituisce '*' o il numero della cella"""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values) -> None:
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, col):
+        value = self.values[col]
+        return MINE if value < 0 else int(value)
+
+    def __iter__(self):
+        for value in self.values.tolist():
+            yield MINE if value < 0 else value
+
+
+class BoardView():
+    """Vista compatibile con la lista di liste: board[r][c] come prima"""
+
+    def __init__(self, mines, counts) -> None:
+        # le bombe sono salvate come -1 cosi' basta una sola lettura per cella
+        self.values = np.where(mines, -1, counts).astype(np.int8)
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def __getitem__(self, row):
+        return BoardRow(self.values[row])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+
+class Minefield():
+    """Bombe, numeri e regioni di zeri di una griglia rows x columns.
+
+    Con lazy=True le bombe vengono messe solo con generate_around, al primo dig;
+    finche' generated e' False mines e counts sono tutti a zero e board e' None.
+    """
+
+    def __init__(self, rows, columns, n_bombs, seed=None, lazy=False) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.n_bombs = n_bombs
+        # con lo stesso seed si riottiene la stessa griglia
+        self.seed = new_seed() if seed is None else seed
+
+        self.mines = np.zeros((rows, columns), dtype=bool)
+        self.counts = np.zeros((rows, columns), dtype=np.int8)
+        self.board = None
+        self.regions = None
+        self.generated = False
+        if not lazy:
+            self.generate()
+
+    @property
+    def bombs(self):
+        return {(int(r), int(c)) for r, c in np.argwhere(self.mines)}
+
+    def generate(self, exclude=()):
+        """Piazza le bombe (non negli indici piatti exclude) e prepara numeri e regioni"""
+        self.set_mines(place_mines(self.rows, self.columns, self.n_bombs, self.seed, exclude))
+
+    def generate_around(self, row, col):
+        """Piazza le bombe lasciando libere la cella (row, col) e le sue vicine"""
+        self.generate(first_click_exclusion(self.rows, self.columns, self.n_bombs, row, col))
+
+    def set_mines(self, mines):
+        """Usa la maschera mines (ad esempio riletta da un file) al posto di piazzare le bombe"""
+        self.mines = mines
+        # numeri di tutte le celle in un solo passaggio, board[r][c] resta valido
+        self.counts = neighbor_counts(mines)
+        self.board = BoardView(mines, self.counts)
+        # regioni di zeri pronte per i dig, calcolate una volta sola
+        self.regions = ZeroRegions(mines, self.counts)
+        self.generated = True
+
+    def get_num_neighboring_bombs(self, row, col):
+        return int(self.counts[row, col])
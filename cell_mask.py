@@ -0,0 +1,139 @@
+"""
+Stato compatto delle celle (scavate, bandierine, sicure) come array di bit.
+
+Un set di tuple (row, col) costa piu' di 100 byte per cella e ogni controllo
+deve fare l'hash di una tupla. CellMask usa un bytearray con un byte per cella
+(np.packbits lo porta a un bit per cella quando va salvato) e si comporta come
+un set: `(r, c) in mask`, add, discard, update, |, -, &, len e iterazione.
+"""
+
+import numpy as np
+
+
+class CellMask():
+    """Insieme di celle (row, col) di una griglia rows x columns.
+
+    Le celle devono stare dentro la griglia, come per board[r][c].
+    """
+
+    __slots__ = ('rows', 'columns', 'bits', 'count')
+
+    def __init__(self, rows, columns, cells=()) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.bits = bytearray(rows * columns)
+        self.count = 0
+        if cells:
+            self.update(cells)
+
+    @classmethod
+    def from_array(cls, rows, columns, array):
+        """Crea la maschera da un array booleano (rows x columns o piatto)"""
+        mask = cls(rows, columns)
+        mask.array[:] = np.asarray(array, dtype=bool).ravel()
+        mask.count = int(np.count_nonzero(mask.array))
+        return mask
+
+    @classmethod
+    def from_packed(cls, rows, columns, packed):
+        """Inverso di packed(): un bit per cella"""
+        return cls.from_array(rows, columns, np.unpackbits(packed, count=rows * columns))
+
+    @property
+    def array(self):
+        """Vista NumPy (bool, piatta) sugli stessi byte: nessuna copia"""
+        return np.frombuffer(self.bits, dtype=bool)
+
+    def packed(self):
+        """Un bit per cella, come np.packbits"""
+        return np.packbits(self.array)
+
+    def copy(self):
+        mask = CellMask(self.rows, self.columns)
+        mask.bits[:] = self.bits
+        mask.count = self.count
+        return mask
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __contains__(self, cell) -> bool:
+        return self.bits[cell[0] * self.columns + cell[1]] == 1
+
+    def __iter__(self):
+        rows, cols = np.divmod(np.flatnonzero(self.array), self.columns)
+        return zip(rows.tolist(), cols.tolist())
+
+    def ids(self):
+        """Celle come indici piatti riga * columns + colonna, in ordine"""
+        return np.flatnonzero(self.array).tolist()
+
+    def __repr__(self) -> str:
+        return f"CellMask({self.rows}x{self.columns}, {self.count} celle)"
+
+    def add(self, cell) -> None:
+        i = cell[0] * self.columns + cell[1]
+        if not self.bits[i]:
+            self.bits[i] = 1
+            self.count += 1
+
+    def discard(self, cell) -> None:
+        i = cell[0] * self.columns + cell[1]
+        if self.bits[i]:
+            self.bits[i] = 0
+            self.count -= 1
+
+    def clear(self) -> None:
+        self.bits[:] = bytes(len(self.bits))
+        self.count = 0
+
+    def add_flat(self, ids) -> None:
+        """Aggiunge in blocco gli indici piatti ids (senza ripetizioni)"""
+        array = self.array
+        self.count += int(np.count_nonzero(~array[ids]))
+        array[ids] = True
+
+    def _as_array(self, other):
+        if isinstance(other, CellMask):
+            return other.array
+        return CellMask(self.rows, self.columns, other).array
+
+    def update(self, cells) -> None:
+        if isinstance(cells, CellMask):
+            array = self.array
+            array |= cells.array
+            self.count = int(np.count_nonzero(array))
+            return
+        for cell in cells:
+            self.add(cell)
+
+    def difference_update(self, cells) -> None:
+        if isinstance(cells, CellMask):
+            array = self.array
+            array &= ~cells.array
+            self.count = int(np.count_nonzero(array))
+            return
+        for cell in cells:
+            self.discard(cell)
+
+    def __or__(self, other):
+        return CellMask.from_array(self.rows, self.columns, self.array | self._as_array(other))
+
+    def __and__(self, other):
+        return CellMask.from_array(self.rows, self.columns, self.array & self._as_array(other))
+
+    def __sub__(self, other):
+        return CellMask.from_array(self.rows, self.columns, self.array & ~self._as_array(other))
+
+    # set piccoli (es. l'intorno di una cella) a sinistra: il risultato resta un set
+    def __ror__(self, other):
+        return set(other) | set(self)
+
+    def __rand__(self, other):
+        return {cell for cell in other if cell in self}
+
+    def __rsub__(self, other):
+        return {cell for cell in other if cell not in self}
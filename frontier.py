@@ -0,0 +1,142 @@
+"""
+Indice della frontiera tenuto aggiornato mossa per mossa.
+
+La frontiera e' la parte della griglia su cui lavorano i solver: i numeri
+scoperti che hanno ancora vicini sconosciuti e le celle sconosciute che
+toccano un numero scoperto. Invece di ritrovarla scandendo tutta la griglia
+ad ogni chiamata, Frontier tiene per ogni cella quanti vicini sono ancora
+sconosciuti e quanti sono numeri scoperti; un dig o una bandierina
+aggiornano solo le celle cambiate e le loro vicine.
+
+Sconosciuta vuol dire ne' scavata ne' con la bandierina. Le celle sono indici
+piatti riga * columns + colonna; number_cells e unknown_cells le restituiscono
+come tuple (riga, colonna).
+"""
+
+import numpy as np
+
+from board_engine import neighbor_counts, neighbor_table
+
+
+class Frontier():
+    """Frontiera di una griglia rows x columns"""
+
+    def __init__(self, rows, columns) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.size = size = rows * columns
+        self.table = neighbor_table(rows, columns)
+        self.dug = np.zeros(size, dtype=bool)
+        self.flagged = np.zeros(size, dtype=bool)
+        self.numbered = np.zeros(size, dtype=bool)
+        # all'inizio tutti i vicini di ogni cella sono sconosciuti
+        self.unknown_around = self.table.counts.copy()
+        self.numbers_around = np.zeros(size, dtype=np.int8)
+        # numeri scoperti con vicini sconosciuti e celle sconosciute vicine a un numero
+        self.numbers = set()
+        self.unknown = set()
+        # le stesse appartenenze come maschere: i set si toccano solo per le celle che cambiano
+        self.in_numbers = np.zeros(size, dtype=bool)
+        self.in_unknown = np.zeros(size, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.numbers) + len(self.unknown)
+
+    def neighbor_ids(self, ids):
+        """Indici piatti dei vicini di ogni cella in ids (con ripetizioni)"""
+        return self.table.gather(ids)
+
+    def unique(self, ids):
+        """ids senza ripetizioni e in ordine; per insiemi grandi una maschera costa meno di np.unique"""
+        if len(ids) * 8 < self.size:
+            return np.unique(ids)
+        mark = np.zeros(self.size, dtype=bool)
+        mark[ids] = True
+        return np.flatnonzero(mark)
+
+    def add_around(self, counts, ids, delta):
+        """Somma delta a counts per ogni vicino delle celle ids; restituisce i vicini toccati, senza ripetizioni"""
+        around = self.neighbor_ids(ids)
+        if len(around) * 8 < self.size:
+            np.add.at(counts, around, delta)
+            return np.unique(around)
+        hits = np.bincount(around, minlength=self.size)
+        counts += (delta * hits).astype(counts.dtype)
+        return np.flatnonzero(hits)
+
+    def reveal(self, ids, numbered):
+        """Le celle ids sono state scavate; numbered dice quali mostrano un numero maggiore di zero"""
+        ids = np.asarray(ids, dtype=np.int64)
+        new = ~self.dug[ids]
+        ids = ids[new]
+        if not len(ids):
+            return
+        # una cella ripetuta ha sempre lo stesso numero: basta scriverlo prima di togliere i doppioni
+        self.numbered[ids] = np.asarray(numbered, dtype=bool)[new]
+        ids = self.unique(ids)
+        numbered = self.numbered[ids]
+        # una bandierina scavata era gia' nota: i suoi vicini non cambiano il conto degli sconosciuti
+        touched = [ids,
+                   self.add_around(self.unknown_around, ids[~self.flagged[ids]], -1),
+                   self.add_around(self.numbers_around, ids[numbered], 1)]
+        self.dug[ids] = True
+        cells = np.concatenate(touched)
+        # solo il bordo della zona scoperta puo' cambiare frontiera: gli zeri scavati
+        # hanno solo vicini scoperti e non ci entrano piu' (al massimo ne escono)
+        ring = self.numbered[cells] | ~self.dug[cells] | self.in_unknown[cells]
+        self.update(cells[ring])
+
+    def flag(self, ids):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        ids = ids[~self.flagged[ids]]
+        self.flagged[ids] = True
+        ids = ids[~self.dug[ids]]
+        self.update(np.concatenate((ids, self.add_around(self.unknown_around, ids, -1))))
+
+    def unflag(self, ids):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        ids = ids[self.flagged[ids]]
+        self.flagged[ids] = False
+        ids = ids[~self.dug[ids]]
+        self.update(np.concatenate((ids, self.add_around(self.unknown_around, ids, 1))))
+
+    def refresh(self, ids):
+        """Ricalcola l'appartenenza alla frontiera delle celle ids e delle loro vicine"""
+        if not len(ids):
+            return
+        ids = np.asarray(ids, dtype=np.int64)
+        self.update(np.concatenate((ids, self.neighbor_ids(ids))))
+
+    def update(self, cells):
+        """Ricalcola l'appartenenza delle celle (anche ripetute) e aggiorna i set solo dove cambia"""
+        if not len(cells):
+            return
+        number = self.dug[cells] & self.numbered[cells] & (self.unknown_around[cells] > 0)
+        unknown = ~self.dug[cells] & ~self.flagged[cells] & (self.numbers_around[cells] > 0)
+        for members, mask, now in ((self.numbers, self.in_numbers, number), (self.unknown, self.in_unknown, unknown)):
+            before = mask[cells]
+            members.difference_update(cells[before & ~now].tolist())
+            members.update(cells[now & ~before].tolist())
+            mask[cells] = now
+
+    def rebuild(self, dug, flagged, numbered):
+        """Ricostruisce tutto da maschere booleane (piatte o rows x columns), ad esempio dopo un load"""
+        shape = (self.rows, self.columns)
+        self.dug = np.asarray(dug, dtype=bool).ravel().copy()
+        self.flagged = np.asarray(flagged, dtype=bool).ravel().copy()
+        self.numbered = np.asarray(numbered, dtype=bool).ravel() & self.dug
+        unknown = ~self.dug & ~self.flagged
+        self.unknown_around = neighbor_counts(unknown.reshape(shape)).ravel()
+        self.numbers_around = neighbor_counts(self.numbered.reshape(shape)).ravel()
+        self.in_numbers = self.numbered & (self.unknown_around > 0)
+        self.in_unknown = unknown & (self.numbers_around > 0)
+        self.numbers = set(np.flatnonzero(self.in_numbers).tolist())
+        self.unknown = set(np.flatnonzero(self.in_unknown).tolist())
+
+    def number_cells(self):
+        """Numeri della frontiera come (riga, colonna), in ordine"""
+        return [divmod(cell, self.columns) for cell in sorted(self.numbers)]
+
+    def unknown_cells(self):
+        """Celle sconosciute della frontiera come (riga, colonna), in ordine"""
+        return [divmod(cell, self.columns) for cell in sorted(self.unknown)]
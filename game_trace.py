@@ -0,0 +1,244 @@
+"""
+Registrazione compatta delle partite e loro replay.
+
+Invece di riscrivere tutta la griglia in un file di testo ad ogni mossa, una
+traccia salva solo il flusso delle mosse in binario. Il seed nell'intestazione
+basta a ricostruire la griglia iniziale. Ogni mossa e' un varint con
+(cella << 2) | tipo; dopo un dig segue un secondo varint con il numero di celle
+scoperte, che il replay usa per controllare di essere ancora allineato.
+
+    intestazione: b'MSTR', versione, poi varint rows, columns, mines, seed, lazy
+    mossa:        varint((cella << 2) | tipo) [varint(scoperte) se tipo == DIG]
+
+La cella e' l'indice piatto riga * columns + colonna. ReplayEngine porta la
+partita a qualunque mossa ripartendo da snapshot periodici invece che
+dall'inizio. Per vedere la griglia dopo la mossa N:
+
+    python game_trace.py partita.trace --move N
+"""
+
+import argparse
+import bisect
+
+from cell_mask import CellMask
+
+MAGIC = b'MSTR'
+VERSION = 1
+
+DIG = 0
+FLAG = 1
+UNFLAG = 2
+KINDS = ('dig', 'flag', 'unflag')
+
+
+def write_varint(buffer, value):
+    """Aggiunge value (intero >= 0) a buffer in 7 bit per byte, il bit alto dice se ne seguono altri"""
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, position):
+    """Legge un varint da data a partire da position e restituisce (valore, nuova posizione)"""
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class TraceRecorder():
+    """Scrive le mosse di una partita su file, accumulandole in memoria fino a buffer_size byte"""
+
+    def __init__(self, path, rows, columns, n_bombs, seed, lazy=False, buffer_size=1 << 16) -> None:
+        self.file = open(path, 'wb')
+        self.buffer_size = buffer_size
+        self.buffer = bytearray(MAGIC)
+        self.buffer.append(VERSION)
+        for value in (rows, columns, n_bombs, seed, int(lazy)):
+            write_varint(self.buffer, value)
+        self.moves = 0
+
+    def record(self, kind, cell, revealed=0):
+        write_varint(self.buffer, (cell << 2) | kind)
+        if kind == DIG:
+            write_varint(self.buffer, revealed)
+        self.moves += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def dig(self, cell, revealed):
+        self.record(DIG, cell, revealed)
+
+    def flag(self, cell):
+        self.record(FLAG, cell)
+
+    def unflag(self, cell):
+        self.record(UNFLAG, cell)
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Trace():
+    """Intestazione e mosse di una traccia letta da file; moves e' una lista di (tipo, cella, scoperte)"""
+
+    def __init__(self, rows, columns, n_bombs, seed, lazy, moves) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.n_bombs = n_bombs
+        self.seed = seed
+        self.lazy = lazy
+        self.moves = moves
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __repr__(self) -> str:
+        return f"Trace({self.rows}x{self.columns}, {self.n_bombs} bombe, seed {self.seed}, {len(self.moves)} mosse)"
+
+
+def read_trace(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} non e' una traccia di partita")
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(f"versione {data[len(MAGIC)]} della traccia non supportata")
+
+    position = len(MAGIC) + 1
+    header = []
+    for _ in range(5):
+        value, position = read_varint(data, position)
+        header.append(value)
+    rows, columns, n_bombs, seed, lazy = header
+
+    moves = []
+    while position < len(data):
+        value, position = read_varint(data, position)
+        kind, cell = value & 3, value >> 2
+        revealed = 0
+        if kind == DIG:
+            revealed, position = read_varint(data, position)
+        moves.append((kind, cell, revealed))
+    return Trace(rows, columns, n_bombs, seed, bool(lazy), moves)
+
+
+def apply_move(game, kind, cell, revealed):
+    """Rifa' una mossa registrata su game (un Minesweeper.Game) e controlla le celle scoperte"""
+    row, col = divmod(cell, game.board_data.columns)
+    if kind == FLAG:
+        game.flag(row, col)
+    elif kind == UNFLAG:
+        game.unflag(row, col)
+    elif revealed or (row, col) not in game.flags:
+        # un dig su una bandierina che non ha scoperto niente era stato annullato dal giocatore
+        game.unflag(row, col)
+        before = len(game.dug)
+        game.dig(row, col)
+        if len(game.dug) - before != revealed:
+            raise ValueError(f"la mossa su {(row, col)} scopre {len(game.dug) - before} celle invece di {revealed}")
+
+
+def new_game(trace):
+    """Partita appena iniziata con la griglia della traccia (non ancora generata se lazy)"""
+    from Minesweeper import Game
+
+    return Game.new(trace.rows, trace.columns, trace.n_bombs, trace.seed, trace.lazy)
+
+
+def replay(trace, moves=None):
+    """Ricostruisce la partita dopo le prime moves mosse (tutte se None)"""
+    game = new_game(trace)
+    for kind, cell, revealed in trace.moves[:moves]:
+        apply_move(game, kind, cell, revealed)
+    return game
+
+
+class ReplayEngine():
+    """Porta una partita registrata a qualunque mossa senza rifarla dall'inizio.
+
+    Ogni interval mosse rifatte si salva uno snapshot delle celle scoperte e delle
+    bandierine (un bit per cella). seek(n) riparte dallo snapshot piu' vicino
+    prima di n, oppure dalla posizione corrente se e' piu' vicina, e rifa' solo
+    le mosse che mancano. La griglia non cambia mai dopo la prima mossa, quindi
+    tutti gli snapshot la condividono.
+
+    seek restituisce la partita interna: va letta, non modificata.
+    """
+
+    def __init__(self, trace, interval=1000) -> None:
+        self.trace = trace
+        self.interval = interval
+        self.game = new_game(trace)
+        self.position = 0
+        self.snapshots = {0: self.snapshot()}
+        # indici degli snapshot in ordine, per bisect
+        self.indices = [0]
+
+    def __len__(self) -> int:
+        return len(self.trace)
+
+    def snapshot(self):
+        return self.game.dug.packed(), self.game.flags.packed()
+
+    def restore(self, index):
+        dug, flags = self.snapshots[index]
+        rows, columns = self.trace.rows, self.trace.columns
+        self.game.dug = CellMask.from_packed(rows, columns, dug)
+        self.game.flags = CellMask.from_packed(rows, columns, flags)
+        self.game.sync()
+        self.position = index
+
+    def seek(self, index):
+        """Partita dopo le prime index mosse"""
+        index = max(0, min(index, len(self.trace)))
+        start = self.indices[bisect.bisect_right(self.indices, index) - 1]
+        if not start <= self.position <= index:
+            self.restore(start)
+
+        moves = self.trace.moves
+        while self.position < index:
+            apply_move(self.game, *moves[self.position])
+            self.position += 1
+            if self.position % self.interval == 0 and self.position not in self.snapshots:
+                self.snapshots[self.position] = self.snapshot()
+                bisect.insort(self.indices, self.position)
+        return self.game
+
+    def step(self, moves=1):
+        """Avanza (o torna indietro, con moves negativo) di moves mosse"""
+        return self.seek(self.position + moves)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mostra la griglia di una partita registrata dopo una certa mossa")
+    parser.add_argument('path')
+    parser.add_argument('--move', type=int, default=None, help="numero di mosse da rifare (default: tutte)")
+    args = parser.parse_args(argv)
+
+    trace = read_trace(args.path)
+    game = replay(trace, args.move)
+    print(trace)
+    print(game)
+
+
+if __name__ == '__main__':
+    main()
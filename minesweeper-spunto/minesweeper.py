@@ -138,42 +138,18 @@ class Board:
                 else:
                     visible_board[row][col] = ' '
         
-        # put this together in a string
-        string_rep = ''
-        # get max column widths for printing
-        widths = []
-        for idx in range(self.dim_size):
-            columns = map(lambda x: x[idx], visible_board)
-            widths.append(
-                len(
-                    max(columns, key = len)
-                )
-            )
-
-        # print the csv strings
-        indices = [i for i in range(self.dim_size)]
-        indices_row = '   '
-        cells = []
-        for idx, col in enumerate(indices):
-            format = '%-' + str(widths[idx]) + "s"
-            cells.append(format % (col))
-        indices_row += '  '.join(cells)
-        indices_row += '  \n'
-        
-        for i in range(len(visible_board)):
-            row = visible_board[i]
-            string_rep += f'{i} |'
-            cells = []
-            for idx, col in enumerate(row):
-                format = '%-' + str(widths[idx]) + "s"
-                cells.append(format % (col))
-            string_rep += ' |'.join(cells)
-            string_rep += ' |\n'
-
-        str_len = int(len(string_rep) / self.dim_size)
-        string_rep = indices_row + '-'*str_len + '\n' + string_rep + '-'*str_len
-
-        return string_rep
+        # get max column widths for printing, in a single pass over the columns
+        widths = [max(map(len, column)) for column in zip(*visible_board)]
+
+        # put this together in a string: build a list of pieces and join it once at the end
+        indices_row = '   ' + '  '.join('%-*s' % (widths[idx], idx) for idx in range(self.dim_size)) + '  \n'
+
+        lines = []
+        for i, row in enumerate(visible_board):
+            lines.append(f'{i} |' + ' |'.join('%-*s' % (widths[idx], col) for idx, col in enumerate(row)) + ' |\n')
+
+        str_len = int(sum(map(len, lines)) / self.dim_size)
+        return ''.join([indices_row, '-'*str_len, '\n', *lines, '-'*str_len])
 
 # play the game
 def play(dim_size=10, num_bombs=10):
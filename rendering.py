@@ -0,0 +1,197 @@
+"""
+Supporto al disegno con pygame condiviso dalle due interfacce grafiche.
+
+GlyphCache tiene i testi delle celle gia' renderizzati: pygame.font.Font e
+font.render vengono chiamati una volta per simbolo e per dimensione di cella,
+non una volta per cella ad ogni frame.
+
+Camera e' la finestra sulla griglia: si sposta e fa zoom, e dice quali celle
+sono visibili, cosi' si disegnano solo quelle anche su griglie enormi.
+
+SpriteAtlas mette in una sola superficie una tessera per ogni stato di cella;
+BoardSurface e' la griglia intera disegnata fuori schermo con quelle tessere,
+aggiornata cella per cella, cosi' un frame e' un solo blit.
+"""
+
+import pygame
+
+# simboli che una cella puo' mostrare: numeri, bomba/bandierina, bandierina, vuota
+SYMBOLS = tuple(range(9)) + ('*', 'F', ' ')
+
+
+class GlyphCache():
+    """Testi delle celle pre-renderizzati, rifatti solo quando cambia la dimensione delle celle"""
+
+    def __init__(self, color=(0, 0, 0), max_font_size=36) -> None:
+        self.color = color
+        self.max_font_size = max_font_size
+        self.size = None
+        self.font = None
+        self.glyphs = {}
+
+    def resize(self, cell_width, cell_height):
+        """Prepara i simboli per celle cell_width x cell_height (non fa niente se la dimensione e' la stessa)"""
+        if self.size == (cell_width, cell_height):
+            return
+        self.size = (cell_width, cell_height)
+        self.font = pygame.font.Font(None, min(self.max_font_size, max(8, int(cell_height))))
+        self.glyphs = {}
+        for symbol in SYMBOLS:
+            self.render(symbol)
+
+    def render(self, value):
+        """Restituisce (superficie, dx, dy): il testo e lo scostamento per centrarlo nella cella"""
+        testo = self.font.render(str(value if value != None else " "), True, self.color)
+        dx = (self.size[0] - testo.get_width()) // 2
+        dy = (self.size[1] - testo.get_height()) // 2
+        self.glyphs[value] = (testo, dx, dy)
+        return self.glyphs[value]
+
+    def get(self, value):
+        glyph = self.glyphs.get(value)
+        if glyph is None:
+            glyph = self.render(value)
+        return glyph
+
+
+class Camera():
+    """Vista rettangolare sulla griglia, in pixel: (x, y) e' l'angolo in alto a sinistra della finestra"""
+
+    def __init__(self, width, height, rows, columns, min_cell=16, max_cell=64) -> None:
+        self.width = width
+        self.height = height
+        self.rows = rows
+        self.columns = columns
+        self.min_cell = min_cell
+        self.max_cell = max_cell
+        # tutta la griglia nella finestra se le celle restano leggibili, altrimenti celle minime
+        self.cell_size = int(max(min_cell, min(max_cell, width / columns, height / rows)))
+        self.x = 0
+        self.y = 0
+        self.clamp()
+
+    def clamp(self):
+        """Tiene la vista dentro la griglia; se la griglia e' piu' piccola della finestra la centra"""
+        board_width = self.columns * self.cell_size
+        board_height = self.rows * self.cell_size
+        if board_width <= self.width:
+            self.x = (board_width - self.width) // 2
+        else:
+            self.x = min(max(0, self.x), board_width - self.width)
+        if board_height <= self.height:
+            self.y = (board_height - self.height) // 2
+        else:
+            self.y = min(max(0, self.y), board_height - self.height)
+
+    def pan(self, dx, dy):
+        self.x += dx
+        self.y += dy
+        self.clamp()
+
+    def zoom(self, step, around=None):
+        """Cambia la dimensione delle celle di step pixel tenendo fermo il punto around dello schermo"""
+        size = min(self.max_cell, max(self.min_cell, self.cell_size + step))
+        if size == self.cell_size:
+            return
+        px, py = around if around is not None else (self.width // 2, self.height // 2)
+        # punto della griglia sotto around, in celle
+        bx = (self.x + px) / self.cell_size
+        by = (self.y + py) / self.cell_size
+        self.cell_size = size
+        self.x = int(bx * size) - px
+        self.y = int(by * size) - py
+        self.clamp()
+
+    def visible_range(self):
+        """(prima riga, ultima riga + 1, prima colonna, ultima colonna + 1) delle celle in vista"""
+        size = self.cell_size
+        r0 = max(0, self.y // size)
+        r1 = min(self.rows, (self.y + self.height) // size + 1)
+        c0 = max(0, self.x // size)
+        c1 = min(self.columns, (self.x + self.width) // size + 1)
+        return r0, r1, c0, c1
+
+    def is_visible(self, row, col):
+        r0, r1, c0, c1 = self.visible_range()
+        return r0 <= row < r1 and c0 <= col < c1
+
+    def cell_at(self, posizione):
+        """Cella sotto il punto posizione dello schermo, None se fuori dalla griglia"""
+        row = (posizione[1] + self.y) // self.cell_size
+        col = (posizione[0] + self.x) // self.cell_size
+        if 0 <= row < self.rows and 0 <= col < self.columns:
+            return row, col
+        return None
+
+    def cell_rect(self, row, col):
+        """Rettangolo sullo schermo della cella (row, col)"""
+        size = self.cell_size
+        return pygame.Rect(col * size - self.x, row * size - self.y, size, size)
+
+
+class SpriteAtlas():
+    """Una superficie con una tessera cell_size x cell_size per ogni stato di cella.
+
+    fills associa ad ogni stato (0-8, ' ', '*', ...) il colore di riempimento; lo
+    stato 'safe' (cella che il bot ha trovato sicura) e' tutto nero.
+    """
+
+    def __init__(self, cell_size, fills, border=(0, 0, 0), text=(0, 0, 0)) -> None:
+        self.cell_size = cell_size
+        glyphs = GlyphCache(text)
+        glyphs.resize(cell_size, cell_size)
+
+        keys = list(fills) + ['safe']
+        self.surface = pygame.Surface((cell_size * len(keys), cell_size))
+        self.areas = {}
+        for i, key in enumerate(keys):
+            x = i * cell_size
+            # bordo, riempimento spostato di 2 pixel e testo centrato, come le vecchie celle
+            self.surface.fill(border, pygame.Rect(x, 0, cell_size, cell_size))
+            self.surface.fill(border if key == 'safe' else fills[key], pygame.Rect(x + 2, 2, cell_size - 2, cell_size - 2))
+            if key != 'safe':
+                testo, dx, dy = glyphs.get(key)
+                self.surface.blit(testo, (x + dx, dy))
+            self.areas[key] = pygame.Rect(x, 0, cell_size, cell_size)
+
+    def blit(self, target, key, position):
+        target.blit(self.surface, position, self.areas[key])
+
+
+class BoardSurface():
+    """Tutta la griglia disegnata fuori schermo con le tessere di un SpriteAtlas"""
+
+    # oltre questa dimensione (circa 64 MB) la superficie non si crea e si disegna tessera per tessera
+    MAX_PIXELS = 4096 * 4096
+
+    def __init__(self, atlas, rows, columns) -> None:
+        self.atlas = atlas
+        self.rows = rows
+        self.columns = columns
+        self.surface = pygame.Surface((columns * atlas.cell_size, rows * atlas.cell_size))
+
+    @classmethod
+    def fits(cls, rows, columns, cell_size) -> bool:
+        return rows * columns * cell_size * cell_size <= cls.MAX_PIXELS
+
+    def update(self, cells, key):
+        """Ridisegna le celle indicate; key(riga, colonna) da' la tessera di ciascuna"""
+        size = self.atlas.cell_size
+        for riga, colonna in cells:
+            self.atlas.blit(self.surface, key(riga, colonna), (colonna * size, riga * size))
+
+    def redraw(self, key):
+        self.update(((r, c) for r in range(self.rows) for c in range(self.columns)), key)
+
+    def blit_cells(self, target, camera, cells):
+        """Copia sulla finestra solo le celle indicate, in una sola chiamata a blits; restituisce i loro rettangoli"""
+        size = self.atlas.cell_size
+        rects = [camera.cell_rect(riga, colonna) for riga, colonna in cells]
+        target.blits([(self.surface, rect, pygame.Rect(rect.x + camera.x, rect.y + camera.y, size, size))
+                      for rect in rects], doreturn=False)
+        return rects
+
+    def blit_to(self, target, camera):
+        """Copia sulla finestra la parte di griglia inquadrata dalla camera, con un solo blit"""
+        area = pygame.Rect(max(0, camera.x), max(0, camera.y), camera.width, camera.height)
+        target.blit(self.surface, (max(0, -camera.x), max(0, -camera.y)), area)
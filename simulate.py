@@ -0,0 +1,262 @@
+"""
+Simulatore headless per misurare i bot: niente pygame e niente stampe per mossa.
+
+Gioca N partite di una configurazione righe/colonne/bombe con il solver scelto
+e riporta in JSON percentuale di vittorie, mosse, tentativi e tempo per partita.
+Con --workers le partite vengono divise a blocchi tra piu' processi.
+
+    python simulate.py --rows 16 --columns 30 --mines 99 --games 1000 --solver probability --seed 1
+    python simulate.py --games 1000000 --workers 8 --seed 1
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from board_engine import Minefield, make_rng
+from frontier import Frontier
+from solver import ProbabilityEngine, Solver, exhaustive_ids
+
+
+def covered_cells(frontier):
+    """Maschera piatta delle celle coperte senza bandierina"""
+    return ~(frontier.dug | frontier.flagged)
+
+
+def random_guess(covered, rng, mines=()):
+    """Una cella coperta qualsiasi (maschera covered), scelta a caso tra quelle non ancora note come bombe"""
+    candidates = covered.copy()
+    candidates[list(mines)] = False
+    cells = np.flatnonzero(candidates)
+    return int(cells[int(rng.integers(len(cells)))])
+
+
+def propagation_solver(board, n_bombs, flags, rng, engine, frontier):
+    safe, mines = Solver(len(board), len(board[0])).solve_ids(board, flags, sorted(frontier.numbers))
+    return safe, mines, None if safe else random_guess(covered_cells(frontier), rng, mines)
+
+
+def exhaustive_solver(board, n_bombs, flags, rng, engine, frontier):
+    safe, mines = exhaustive_ids(board, len(board), len(board[0]), flags, numbers=sorted(frontier.numbers))
+    return safe, mines, None if safe else random_guess(covered_cells(frontier), rng, mines)
+
+
+def probability_solver(board, n_bombs, flags, rng, engine, frontier):
+    numbers = sorted(frontier.numbers)
+    safe, mines = exhaustive_ids(board, len(board), len(board[0]), flags, numbers=numbers)
+    if safe:
+        return safe, mines, None
+    guess, _ = engine.best_guess_ids(board, n_bombs, flags | mines, numbers=numbers, covered=covered_cells(frontier))
+    return safe, mines, guess
+
+
+# ogni solver riceve la griglia visibile, le bombe note e la Frontier della partita
+# (celle come indici piatti) e restituisce (sicure, bombe, tentativo)
+SOLVERS = {
+    'propagation': propagation_solver,
+    'exhaustive': exhaustive_solver,
+    'probability': probability_solver,
+}
+
+
+class Buffers():
+    """Strutture riusate da una partita all'altra con la stessa forma di griglia"""
+
+    def __init__(self, rows, columns) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.board = [[None] * columns for _ in range(rows)]
+        self.engine = ProbabilityEngine()
+
+    def reset(self):
+        empty = [None] * self.columns
+        for line in self.board:
+            line[:] = empty
+        return self.board
+
+
+def play_game(rows, columns, n_bombs, solver='probability', seed=None, buffers=None):
+    """Gioca una partita completa senza interfaccia e restituisce le sue statistiche"""
+    rng = make_rng(seed)
+    decide = SOLVERS[solver]
+    if buffers is None or (buffers.rows, buffers.columns) != (rows, columns):
+        buffers = Buffers(rows, columns)
+    engine = buffers.engine
+    start = time.perf_counter()
+
+    # primo click al centro, sempre sicuro come in modalita' lazy
+    first = (rows // 2) * columns + columns // 2
+    field = Minefield(rows, columns, n_bombs, rng, lazy=True)
+    field.generate_around(*divmod(first, columns))
+    regions = field.regions
+    mine_list = field.mines.ravel().tolist()
+    count_list = field.counts.ravel().tolist()
+
+    board = buffers.reset()
+    # i solver guardano solo i numeri della frontiera, non tutta la griglia
+    frontier = Frontier(rows, columns)
+    flags = set()
+    revealed = 0
+    target = rows * columns - n_bombs
+    moves = guesses = 0
+    pending = [first]
+    # celle scoperte dall'ultima decisione: la frontiera serve solo ai solver,
+    # quindi si aggiorna in blocco prima di ogni decisione invece che a ogni dig
+    opened = []
+    lost = False
+
+    while revealed < target:
+        if not pending:
+            frontier.reveal(opened, [count_list[i] > 0 for i in opened])
+            opened = []
+            safe, found, guess = decide(board, n_bombs, flags, rng, engine, frontier)
+            if found - flags:
+                frontier.flag(sorted(found - flags))
+                flags |= found
+            if safe:
+                pending = sorted(safe, reverse=True)
+            else:
+                pending = [guess]
+                guesses += 1
+
+        cell = pending.pop()
+        if board[cell // columns][cell % columns] is not None:
+            continue
+        moves += 1
+        if mine_list[cell]:
+            lost = True
+            break
+
+        region = regions.region_of(cell)
+        cells = [cell] if region < 0 else regions.region_cells(region).tolist()
+        for i in cells:
+            line = board[i // columns]
+            if line[i % columns] is None:
+                line[i % columns] = count_list[i]
+                opened.append(i)
+                revealed += 1
+
+    return {
+        'won': not lost,
+        'moves': moves,
+        'guesses': guesses,
+        'time': time.perf_counter() - start,
+    }
+
+
+def game_seed(entropy, index):
+    """Seed della partita index: lo stesso di SeedSequence(entropy).spawn(...)[index], su qualunque processo"""
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+
+
+# buffers del processo corrente, riusati da tutti i blocchi che gli arrivano
+_buffers = None
+
+
+def play_chunk(rows, columns, n_bombs, solver, entropy, first, count):
+    """Gioca le partite first .. first+count-1 e restituisce solo i totali del blocco"""
+    global _buffers
+    if _buffers is None or (_buffers.rows, _buffers.columns) != (rows, columns):
+        _buffers = Buffers(rows, columns)
+
+    totals = {'games': 0, 'wins': 0, 'moves': 0, 'guesses': 0, 'time': 0.0}
+    for index in range(first, first + count):
+        result = play_game(rows, columns, n_bombs, solver, game_seed(entropy, index), _buffers)
+        totals['games'] += 1
+        totals['wins'] += result['won']
+        totals['moves'] += result['moves']
+        totals['guesses'] += result['guesses']
+        totals['time'] += result['time']
+    return totals
+
+
+def _play_chunk(task):
+    return play_chunk(*task)
+
+
+def iter_chunks(games, rows, columns, n_bombs, solver='probability', entropy=0, workers=1, chunk_size=None):
+    """Genera i totali di ogni blocco man mano che i blocchi finiscono.
+
+    Con workers > 1 i blocchi vengono distribuiti su un pool di processi; i seed
+    dipendono solo dall'indice della partita, quindi il risultato complessivo non
+    cambia con il numero di processi.
+    """
+    if chunk_size is None:
+        chunk_size = max(1, min(1000, games // (workers * 8)))
+    tasks = [(rows, columns, n_bombs, solver, entropy, first, min(chunk_size, games - first))
+             for first in range(0, games, chunk_size)]
+
+    if workers <= 1:
+        for task in tasks:
+            yield _play_chunk(task)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(_play_chunk, tasks)
+
+
+def summarize(totals, rows, columns, n_bombs, solver, seed, elapsed):
+    """Riassunto JSON-serializzabile dei totali di una serie di partite"""
+    games = totals['games']
+
+    def mean(key):
+        return totals[key] / games if games else 0.0
+
+    return {
+        'rows': rows,
+        'columns': columns,
+        'mines': n_bombs,
+        'solver': solver,
+        'seed': seed,
+        'games': games,
+        'wins': totals['wins'],
+        'win_rate': mean('wins'),
+        'mean_moves': mean('moves'),
+        'mean_guesses': mean('guesses'),
+        'mean_time': mean('time'),
+        'total_time': elapsed,
+        'games_per_second': games / elapsed if elapsed else 0.0,
+    }
+
+
+def run_batch(games, rows, columns, n_bombs, solver='probability', seed=None, workers=1, chunk_size=None):
+    """Gioca games partite, ognuna con il suo seed derivato da seed, e ne restituisce il riassunto"""
+    start = time.perf_counter()
+    # senza seed se ne estrae uno e lo si riporta nel riassunto, cosi' il batch si puo' ripetere
+    entropy = np.random.SeedSequence(seed).entropy
+
+    totals = {'games': 0, 'wins': 0, 'moves': 0, 'guesses': 0, 'time': 0.0}
+    for chunk in iter_chunks(games, rows, columns, n_bombs, solver, entropy, workers, chunk_size):
+        for key in totals:
+            totals[key] += chunk[key]
+    return summarize(totals, rows, columns, n_bombs, solver, entropy, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulazione headless di partite giocate da un bot")
+    parser.add_argument('--rows', type=int, default=16)
+    parser.add_argument('--columns', type=int, default=30)
+    parser.add_argument('--mines', type=int, default=99)
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='probability')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1, help="processi da usare (default: 1)")
+    parser.add_argument('--chunk-size', type=int, default=None, help="partite per blocco inviato a un processo")
+    parser.add_argument('--output', help="file JSON dove salvare il riassunto (default: stdout)")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.games, args.rows, args.columns, args.mines, args.solver, args.seed, args.workers, args.chunk_size)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(summary, file, indent=2)
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Formato compatto per salvare e ricaricare lo stato di una partita.
+
+Un pickle di Game salverebbe set di tuple e liste di str/int, decine di byte
+per cella. Qui ogni maschera (bombe, scavate, bandierine) e' salvata con
+np.packbits, un bit per cella, dopo una piccola intestazione: una partita
+1000x1000 occupa circa 375 KB.
+
+    intestazione: b'MSSN', versione, generata, 2 byte vuoti,
+                  rows, columns, mines (uint32), seed, moves (uint64), little endian
+    corpo:        bombe, scavate, bandierine, ognuna ceil(rows * columns / 8) byte
+
+Piu' snapshot si possono accodare nello stesso file (archivio). La lettura
+passa da mmap: si leggono le intestazioni per trovare gli snapshot e poi solo
+i byte di quello richiesto.
+"""
+
+import mmap
+import struct
+
+import numpy as np
+
+from cell_mask import CellMask
+
+MAGIC = b'MSSN'
+VERSION = 1
+HEADER = struct.Struct('<4sBB2xIIIQQ')
+
+
+def packed_size(rows, columns) -> int:
+    return (rows * columns + 7) // 8
+
+
+class Snapshot():
+    """Stato di una partita: mines e' la maschera booleana rows x columns, dug e flags sono CellMask"""
+
+    def __init__(self, rows, columns, n_bombs, seed, moves, mines, dug, flags, generated=True) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.n_bombs = n_bombs
+        self.seed = seed
+        self.moves = moves
+        self.mines = mines
+        self.dug = dug
+        self.flags = flags
+        # una partita lazy salvata prima del primo dig non ha ancora le bombe
+        self.generated = generated
+
+    @property
+    def nbytes(self) -> int:
+        return HEADER.size + 3 * packed_size(self.rows, self.columns)
+
+    def to_bytes(self) -> bytes:
+        header = HEADER.pack(MAGIC, VERSION, self.generated, self.rows, self.columns, self.n_bombs, self.seed, self.moves)
+        return b''.join([header, np.packbits(self.mines).tobytes(), self.dug.packed().tobytes(), self.flags.packed().tobytes()])
+
+    @classmethod
+    def from_buffer(cls, buffer, offset=0):
+        """Legge lo snapshot che inizia a offset in buffer (bytes, mmap, ...)"""
+        magic, version, generated, rows, columns, n_bombs, seed, moves = HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC:
+            raise ValueError(f"nessuno snapshot all'offset {offset}")
+        if version != VERSION:
+            raise ValueError(f"versione {version} dello snapshot non supportata")
+
+        size = packed_size(rows, columns)
+        offset += HEADER.size
+        masks = []
+        for i in range(3):
+            packed = np.frombuffer(buffer, dtype=np.uint8, count=size, offset=offset + i * size)
+            masks.append(np.unpackbits(packed, count=rows * columns).astype(bool))
+            # niente riferimenti al buffer: un mmap si puo' chiudere subito dopo
+            del packed
+        mines, dug, flags = masks
+        return cls(rows, columns, n_bombs, seed, moves, mines.reshape(rows, columns),
+                   CellMask.from_array(rows, columns, dug), CellMask.from_array(rows, columns, flags), bool(generated))
+
+
+class SnapshotArchive():
+    """File con uno o piu' snapshot accodati, letto con mmap: archive[i] carica solo l'i-esimo"""
+
+    def __init__(self, path) -> None:
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        # basta leggere le intestazioni per sapere dove inizia ogni snapshot
+        self.offsets = []
+        offset = 0
+        while offset < len(self.map):
+            self.offsets.append(offset)
+            _, _, _, rows, columns, _, _, _ = HEADER.unpack_from(self.map, offset)
+            offset += HEADER.size + 3 * packed_size(rows, columns)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        return Snapshot.from_buffer(self.map, self.offsets[index])
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_snapshot(path, snapshot, append=False):
+    """Scrive snapshot su path; con append=True lo accoda agli snapshot gia' salvati"""
+    with open(path, 'ab' if append else 'wb') as file:
+        file.write(snapshot.to_bytes())
+
+
+def load_snapshot(path, index=-1):
+    """Carica lo snapshot index del file (di default l'ultimo)"""
+    with SnapshotArchive(path) as archive:
+        return archive[index]
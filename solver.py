@@ -0,0 +1,475 @@
+"""
+Motore di deduzione per i bot.
+
+Solver lavora su una griglia visibile come quelle di Game.game_data() o
+Visible.board: un int e' una cella scoperta, '*' una
+bandierina (trattata come bomba), qualunque altro valore una cella coperta.
+
+exhaustive() va oltre le regole semplici: divide la frontiera in componenti
+indipendenti ed enumera tutte le disposizioni di bombe coerenti di ciascuna.
+ProbabilityEngine usa le stesse enumerazioni per stimare la probabilita' di
+bomba di ogni cella quando non resta nessuna mossa sicura.
+"""
+
+from collections import deque
+from math import lgamma
+
+import numpy as np
+
+from board_engine import neighbor_table
+from cell_mask import CellMask
+
+
+def neighbors(rows, columns, row, col):
+    """Celle vicine a (row, col), senza la cella stessa (tupla presa dalla tabella dei vicini)"""
+    return neighbor_table(rows, columns).cells_around(row, col)
+
+
+class Solver():
+    """Propagazione dei vincoli con una coda di celle di frontiera.
+
+    Ogni numero scoperto viene esaminato una volta; quando una cella coperta
+    diventa certa (sicura o bomba) si rimettono in coda solo i numeri attorno a
+    lei. Una chiamata a solve restituisce tutte le deduzioni, non solo la prima.
+    """
+
+    def __init__(self, rows, columns) -> None:
+        self.rows = rows
+        self.columns = columns
+
+    def solve(self, board, flags=(), numbers=None):
+        """Restituisce (sicure, bombe): celle coperte sicuramente libere e bombe forzate non ancora segnate.
+
+        numbers sono i numeri da cui partire (ad esempio quelli di una Frontier);
+        se e' None si prendono tutti i numeri della griglia. Celle come (riga, colonna):
+        e' un adattatore di solve_ids.
+        """
+        columns = self.columns
+        safe, mines = self.solve_ids(board, to_ids(flags, columns), None if numbers is None else to_ids(numbers, columns))
+        return to_cells(safe, columns), to_cells(mines, columns)
+
+    def solve_ids(self, board, flags=(), numbers=None):
+        """Come solve, ma celle in ingresso e in uscita come indici piatti riga * columns + colonna"""
+        rows, columns = self.rows, self.columns
+        around = neighbor_table(rows, columns).around
+        # stato deciso delle celle coperte: True bomba, False sicura ('*' sulla griglia e' sempre bomba)
+        known = dict.fromkeys(flags, True)
+        flagged = set(known)
+
+        if numbers is None:
+            numbers = [r * columns + c for r in range(rows) for c, value in enumerate(board[r]) if type(value) == int]
+        queue = deque(numbers)
+        queued = set(queue)
+
+        while queue:
+            cell = queue.popleft()
+            queued.discard(cell)
+
+            unknown = []
+            mines = 0
+            for n in around(cell):
+                value = board[n // columns][n % columns]
+                if type(value) == int:
+                    continue
+                state = True if value == '*' else known.get(n)
+                if state is None:
+                    unknown.append(n)
+                elif state:
+                    mines += 1
+            if not unknown:
+                continue
+
+            left = board[cell // columns][cell % columns] - mines
+            if left == 0:
+                mine = False
+            elif left == len(unknown):
+                mine = True
+            else:
+                continue
+
+            for n in unknown:
+                known[n] = mine
+                # solo i numeri attorno alla cella appena decisa possono cambiare
+                for m in around(n):
+                    if m not in queued and type(board[m // columns][m % columns]) == int:
+                        queue.append(m)
+                        queued.add(m)
+
+        safe = {cell for cell, mine in known.items() if not mine}
+        mines = {cell for cell, mine in known.items() if mine} - flagged
+        return safe, mines
+
+
+def to_ids(cells, columns):
+    """Celle (riga, colonna) come indici piatti; da una CellMask si leggono direttamente i bit"""
+    if isinstance(cells, CellMask):
+        return cells.ids()
+    return [r * columns + c for r, c in cells]
+
+
+def to_cells(ids, columns):
+    """Inverso di to_ids: set di (riga, colonna)"""
+    return {divmod(cell, columns) for cell in ids}
+
+
+def frontier_constraints(board, rows, columns, flags=(), safe=(), numbers=None):
+    """Vincoli della frontiera: lista di (celle coperte vicine, bombe ancora da trovare).
+
+    Le bandierine (sulla griglia o in flags) contano come bombe, le celle in safe
+    come celle libere gia' note. numbers limita i numeri da guardare, come in Solver.solve.
+    Celle come (riga, colonna): e' un adattatore di frontier_constraints_ids.
+    """
+    constraints = frontier_constraints_ids(board, rows, columns, set(to_ids(flags, columns)), set(to_ids(safe, columns)),
+                                           None if numbers is None else to_ids(numbers, columns))
+    return [(tuple(divmod(cell, columns) for cell in cells), mines) for cells, mines in constraints]
+
+
+def frontier_constraints_ids(board, rows, columns, flags=(), safe=(), numbers=None):
+    """Come frontier_constraints, con indici piatti; flags e safe devono supportare `in` sugli indici"""
+    around = neighbor_table(rows, columns).around
+    if numbers is None:
+        numbers = [r * columns + c for r in range(rows) for c, value in enumerate(board[r]) if type(value) == int]
+    constraints = []
+    for cell in numbers:
+        value = board[cell // columns][cell % columns]
+        unknown = []
+        mines = 0
+        for n in around(cell):
+            v = board[n // columns][n % columns]
+            if type(v) == int:
+                continue
+            if v == '*' or n in flags:
+                mines += 1
+            elif n not in safe:
+                unknown.append(n)
+        if unknown:
+            constraints.append((tuple(unknown), value - mines))
+    return constraints
+
+
+def split_components(constraints):
+    """Divide i vincoli in gruppi che non condividono celle (union-find sulle celle)"""
+    parent = {}
+
+    def find(cell):
+        root = cell
+        while parent[root] != root:
+            root = parent[root]
+        while parent[cell] != root:
+            parent[cell], cell = root, parent[cell]
+        return root
+
+    for cells, _ in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        root = find(cells[0])
+        for cell in cells[1:]:
+            other = find(cell)
+            if other != root:
+                parent[other] = root
+
+    groups = {}
+    for constraint in constraints:
+        groups.setdefault(find(constraint[0][0]), []).append(constraint)
+    return list(groups.values())
+
+
+def enumerate_component(constraints, max_cells=None):
+    """Enumera con backtracking le disposizioni di bombe coerenti con i vincoli.
+
+    Restituisce (celle, soluzioni) dove soluzioni[m] = [numero di soluzioni con m bombe,
+    lista con quante di queste hanno una bomba in ogni cella]. None se le celle
+    sono piu' di max_cells.
+    """
+    # ordine di visita: celle vicine tra loro di seguito, cosi' i vincoli si chiudono presto
+    by_cell = {}
+    for k, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            by_cell.setdefault(cell, []).append(k)
+    order = []
+    seen = set()
+    for start in by_cell:
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            order.append(cell)
+            for k in by_cell[cell]:
+                for other in constraints[k][0]:
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+    if max_cells is not None and len(order) > max_cells:
+        return None
+
+    n = len(order)
+    var_constraints = [by_cell[cell] for cell in order]
+    need = [mines for _, mines in constraints]
+    free = [len(cells) for cells, _ in constraints]
+    assignment = [0] * n
+    solutions = {}
+
+    # pila esplicita invece della ricorsione: le componenti possono essere lunghe
+    stack = [(0, 0, 0)]
+    while stack:
+        i, value, mines = stack.pop()
+        if value < 0:
+            # ritorno dal ramo: ripristina i contatori della variabile i
+            for k in var_constraints[i]:
+                free[k] += 1
+                need[k] += assignment[i]
+            continue
+        if i == n:
+            entry = solutions.get(mines)
+            if entry is None:
+                entry = solutions[mines] = [0, [0] * n]
+            entry[0] += 1
+            counts = entry[1]
+            for j in range(n):
+                if assignment[j]:
+                    counts[j] += 1
+            continue
+        if value == 0:
+            # il ramo con la bomba viene provato dopo quello senza
+            stack.append((i, 1, mines))
+
+        ok = True
+        for k in var_constraints[i]:
+            free[k] -= 1
+            need[k] -= value
+            if need[k] < 0 or need[k] > free[k]:
+                ok = False
+        assignment[i] = value
+        stack.append((i, -1, mines))
+        if ok:
+            stack.append((i + 1, 0, mines + value))
+
+    return order, solutions
+
+
+def exhaustive(board, rows, columns, flags=(), safe=(), max_cells=40, numbers=None):
+    """Celle sicure e bombe certe in ogni soluzione della frontiera.
+
+    Prima si applica la propagazione di Solver, poi si enumerano solo le celle
+    rimaste incerte. Il costo cresce con la componente piu' grande, non con tutta
+    la frontiera; le componenti con piu' di max_cells celle vengono saltate.
+    Celle come (riga, colonna): e' un adattatore di exhaustive_ids.
+    """
+    found_safe, found_mines = exhaustive_ids(board, rows, columns, to_ids(flags, columns), to_ids(safe, columns), max_cells,
+                                             None if numbers is None else to_ids(numbers, columns))
+    return to_cells(found_safe, columns), to_cells(found_mines, columns)
+
+
+def exhaustive_ids(board, rows, columns, flags=(), safe=(), max_cells=40, numbers=None):
+    """Come exhaustive, con indici piatti in ingresso e in uscita"""
+    found_safe, found_mines = Solver(rows, columns).solve_ids(board, flags, numbers)
+    flags = found_mines | set(flags)
+    safe = found_safe | set(safe)
+    for component in split_components(frontier_constraints_ids(board, rows, columns, flags, safe, numbers)):
+        result = enumerate_component(component, max_cells)
+        if result is None:
+            continue
+        cells, solutions = result
+        total = sum(entry[0] for entry in solutions.values())
+        if total == 0:
+            # bandierine sbagliate: nessuna soluzione, niente da dedurre
+            continue
+        for j, cell in enumerate(cells):
+            mined = sum(entry[1][j] for entry in solutions.values())
+            if mined == 0:
+                found_safe.add(cell)
+            elif mined == total:
+                found_mines.add(cell)
+    return found_safe, found_mines
+
+
+_lgamma = np.vectorize(lgamma, otypes=[float])
+
+
+def log_binomial(n, k):
+    """log C(n, k) elemento per elemento, -inf dove k e' fuori da [0, n]"""
+    k = np.asarray(k)
+    ok = (k >= 0) & (k <= n)
+    k = np.where(ok, k, 0)
+    return np.where(ok, lgamma(n + 1) - _lgamma(k + 1) - _lgamma(n - k + 1), -np.inf)
+
+
+def component_key(constraints):
+    """Chiave che identifica una componente: cambia solo se cambiano i suoi vincoli"""
+    return tuple(sorted((tuple(sorted(cells)), mines) for cells, mines in constraints))
+
+
+class ProbabilityEngine():
+    """Probabilita' di bomba delle celle coperte e scelta del tentativo meno rischioso.
+
+    Ogni componente della frontiera viene enumerata per numero di bombe; le
+    componenti si combinano pesando ogni totale con C(interne, bombe rimaste),
+    dove le interne sono le celle coperte che non toccano nessun numero.
+    Le enumerazioni restano in cache finche' i vincoli della componente non
+    cambiano; la chiave dipende solo dai vincoli, quindi la cache vale anche
+    tra partite diverse.
+    """
+
+    def __init__(self, max_cells=40) -> None:
+        self.max_cells = max_cells
+        self.cache = {}
+
+    def enumerate(self, constraints):
+        key = component_key(constraints)
+        # None (componente troppo grande) e' un risultato valido: va tenuto in cache anche lui
+        if key in self.cache:
+            return key, self.cache[key]
+        result = self.cache[key] = enumerate_component(constraints, self.max_cells)
+        return key, result
+
+    def probabilities(self, board, n_bombs, flags=(), safe=(), numbers=None, covered=None):
+        """Restituisce (probabilita', p_interna, interne).
+
+        probabilita' e' un dict cella -> probabilita' per le celle di frontiera (e
+        quelle gia' dedotte), p_interna vale per ognuna delle celle in interne.
+
+        numbers limita i numeri da guardare, come in Solver.solve. covered e' la
+        maschera booleana (rows x columns o piatta) delle celle coperte senza
+        bandierina, ad esempio da Game.dug e Game.flags: con covered le interne si
+        trovano con NumPy invece di scandire la griglia, e le bombe note devono
+        essere tutte in flags. Celle come (riga, colonna): e' un adattatore di
+        probabilities_ids.
+        """
+        columns = len(board[0])
+        probability, p_interior, unknown = self.probabilities_ids(
+            board, n_bombs, to_ids(flags, columns), to_ids(safe, columns),
+            None if numbers is None else to_ids(numbers, columns), covered)
+        return ({divmod(cell, columns): p for cell, p in probability.items()}, p_interior,
+                [divmod(cell, columns) for cell in unknown])
+
+    def probabilities_ids(self, board, n_bombs, flags=(), safe=(), numbers=None, covered=None):
+        """Come probabilities, con indici piatti in ingresso e in uscita"""
+        rows, columns = len(board), len(board[0])
+        known_safe, known_mines = Solver(rows, columns).solve_ids(board, flags, numbers)
+        flags = known_mines | set(flags)
+        safe = known_safe | set(safe)
+
+        probability = {cell: 0.0 for cell in safe}
+        probability.update({cell: 1.0 for cell in known_mines})
+
+        constraints = frontier_constraints_ids(board, rows, columns, flags, safe, numbers)
+        frontier = {cell for cells, _ in constraints for cell in cells}
+
+        if covered is None:
+            unknown = []
+            flagged = 0
+            for r in range(rows):
+                line = board[r]
+                for c in range(columns):
+                    value = line[c]
+                    if type(value) == int:
+                        continue
+                    cell = r * columns + c
+                    if value == '*' or cell in flags:
+                        flagged += 1
+                    elif cell not in safe and cell not in frontier:
+                        unknown.append(cell)
+        else:
+            interior = np.array(covered, dtype=bool).ravel()
+            interior[np.fromiter(flags | safe | frontier, dtype=np.int64)] = False
+            unknown = np.flatnonzero(interior).tolist()
+            flagged = len(flags)
+        remaining = n_bombs - flagged
+
+        components = []
+        used = set()
+        for component in split_components(constraints):
+            key, result = self.enumerate(component)
+            used.add(key)
+            if result is None:
+                # troppo grande da enumerare: le sue celle contano come interne
+                unknown.extend(sorted({cell for cells, _ in component for cell in cells}))
+                continue
+            cells, solutions = result
+            top = max(solutions) if solutions else 0
+            weights = np.zeros(top + 1)
+            counts = np.zeros((top + 1, len(cells)))
+            for m, (n, per_cell) in solutions.items():
+                weights[m] = n
+                counts[m] = per_cell
+            if not weights.any():
+                # nessuna soluzione (bandierine sbagliate): la componente non da' informazioni
+                unknown.extend(cells)
+                continue
+            scale = weights.max()
+            components.append((cells, weights / scale, counts / scale))
+
+        # invalidazione: restano solo le componenti ancora presenti sulla griglia
+        for key in list(self.cache):
+            if key not in used:
+                del self.cache[key]
+
+        interior = len(unknown)
+
+        def convolve_all(parts):
+            total = np.ones(1)
+            for part in parts:
+                total = np.convolve(total, part)
+                total /= total.max()
+            return total
+
+        # prefissi e suffissi per avere, per ogni componente, la distribuzione di tutte le altre
+        n = len(components)
+        prefix = [np.ones(1)]
+        for cells, weights, _ in components:
+            prefix.append(convolve_all([prefix[-1], weights]))
+        suffix = [np.ones(1)]
+        for cells, weights, _ in reversed(components):
+            suffix.append(convolve_all([suffix[-1], weights]))
+        suffix.reverse()
+
+        for i, (cells, weights, counts) in enumerate(components):
+            others = convolve_all([prefix[i], suffix[i + 1]])
+            # f[m] = somma_t others[t] * C(interne, rimaste - m - t)
+            m = np.arange(len(weights))[:, None]
+            t = np.arange(len(others))[None, :]
+            log_b = log_binomial(interior, remaining - m - t)
+            if np.isneginf(log_b).all():
+                continue
+            f = (others[None, :] * np.exp(log_b - log_b.max())).sum(axis=1)
+            total = (weights * f).sum()
+            if total == 0:
+                continue
+            for j, cell in enumerate(cells):
+                probability[cell] = float((counts[:, j] * f).sum() / total)
+
+        p_interior = 0.0
+        if interior:
+            everything = convolve_all([prefix[-1]])
+            t = np.arange(len(everything))
+            log_b = log_binomial(interior, remaining - t)
+            if not np.isneginf(log_b).all():
+                w = everything * np.exp(log_b - log_b.max())
+                p_interior = float((w * (remaining - t)).sum() / (w.sum() * interior))
+            else:
+                p_interior = min(1.0, max(0.0, remaining / interior))
+
+        return probability, p_interior, unknown
+
+    def best_guess(self, board, n_bombs, flags=(), safe=(), numbers=None, covered=None):
+        """Cella coperta con la probabilita' di bomba piu' bassa: (cella, probabilita').
+
+        Celle come (riga, colonna): e' un adattatore di best_guess_ids.
+        """
+        columns = len(board[0])
+        cell, p = self.best_guess_ids(board, n_bombs, to_ids(flags, columns), to_ids(safe, columns),
+                                      None if numbers is None else to_ids(numbers, columns), covered)
+        return None if cell is None else divmod(cell, columns), p
+
+    def best_guess_ids(self, board, n_bombs, flags=(), safe=(), numbers=None, covered=None):
+        """Come best_guess, con indici piatti"""
+        columns = len(board[0])
+        probability, p_interior, interior = self.probabilities_ids(board, n_bombs, flags, safe, numbers, covered)
+        candidates = [(p, cell) for cell, p in probability.items()
+                      if p < 1.0 and type(board[cell // columns][cell % columns]) != int]
+        best = min(candidates) if candidates else (1.0, None)
+        if interior and p_interior < best[0]:
+            best = (p_interior, interior[0])
+        return best[1], best[0]
@@ -0,0 +1,75 @@
+"""
+Disegno testuale della griglia per giocare da terminale o salvare log.
+
+TextRenderer tiene in memoria la stringa di ogni riga e rifa' solo le righe
+segnate come cambiate dall'ultimo disegno: dopo un dig o una bandierina il
+costo e' proporzionale alle righe toccate, non a tutta la griglia.
+Il risultato si ottiene con render() (un solo ''.join) oppure si scrive riga
+per riga su uno stream con write(), senza mai costruire la stringa intera.
+
+Il formato e' quello del vecchio Board.__str__:
+
+       0  1  2
+    ---------
+    0 |1 |  |* |
+    1 |  |2 |  |
+    ---------
+"""
+
+import numpy as np
+
+
+class TextRenderer():
+    """Righe di testo di una griglia rows x columns, ricostruite solo quando cambiano.
+
+    cell_text(riga, colonna) deve restituire il carattere da mostrare per la cella:
+    ogni cella e' larga un carattere, quindi le colonne non vanno mai rimisurate.
+    """
+
+    def __init__(self, rows, columns, cell_text) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.cell_text = cell_text
+        self.lines = [None] * rows
+        self.dirty = set(range(rows))
+
+        self.header = '   ' + '  '.join(str(col) for col in range(columns)) + '  \n'
+        # stessa lunghezza del separatore di prima: la media delle righe, a capo compreso
+        line_lengths = sum(len(str(row)) for row in range(rows)) + rows * (3 * columns + 3)
+        self.separator = '-' * (line_lengths // rows if rows else 0)
+
+    def invalidate(self, cells):
+        """Segna da ridisegnare le righe delle celle (riga, colonna) indicate"""
+        self.dirty.update(row for row, _ in cells)
+
+    def invalidate_flat(self, ids):
+        """Come invalidate, ma con indici piatti (riga * columns + colonna)"""
+        self.dirty.update(np.unique(np.asarray(ids) // self.columns).tolist())
+
+    def invalidate_all(self):
+        self.dirty.update(range(self.rows))
+
+    def line(self, row):
+        cell_text = self.cell_text
+        return f'{row} |' + ' |'.join([cell_text(row, col) for col in range(self.columns)]) + ' |\n'
+
+    def refresh(self):
+        """Ricostruisce le righe cambiate e restituisce la lista aggiornata"""
+        for row in self.dirty:
+            self.lines[row] = self.line(row)
+        self.dirty.clear()
+        return self.lines
+
+    def render(self) -> str:
+        lines = self.refresh()
+        return ''.join([self.header, self.separator, '\n', *lines, self.separator])
+
+    def write(self, stream):
+        """Scrive la griglia su stream (file, sys.stdout, ...) una riga alla volta"""
+        lines = self.refresh()
+        stream.write(self.header)
+        stream.write(self.separator)
+        stream.write('\n')
+        for line in lines:
+            stream.write(line)
+        stream.write(self.separator)